@@ -0,0 +1,104 @@
+"""
+Asyncio interface for Smart Library System.
+Runs the Library operations on SQLAlchemy's async engine (aiosqlite).
+"""
+
+import asyncio
+import functools
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from db_init import EngineConfig, init_db, register_sqlite_pragmas
+from library import Library
+
+DEFAULT_ASYNC_URL = 'sqlite+aiosqlite:///library.db'
+
+# Public Library methods without a coroutine: sessions and lazy iterators would
+# run their SQL outside run(), the counters are in memory (use .library) and
+# close() is part of dispose()
+SYNC_ONLY_METHODS = ('get_session', 'close', 'iter_books', 'iter_search', 'iter_users',
+                     'cache_stats', 'metrics', 'reset_metrics')
+
+# Library methods exposed as coroutines on AsyncLibrary: every other public method
+ASYNC_METHODS = tuple(
+    name for name, member in vars(Library).items()
+    if callable(member) and not name.startswith('_') and name not in SYNC_ONLY_METHODS
+)
+
+def create_library_async_engine(config: EngineConfig) -> AsyncEngine:
+    """Async counterpart of db_init.create_library_engine (URL must use an async driver)."""
+    engine = create_async_engine(
+        config.url,
+        echo=config.echo,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=config.pool_size,
+        max_overflow=config.max_overflow,
+        pool_timeout=config.pool_timeout,
+        pool_recycle=config.pool_recycle,
+        pool_pre_ping=config.pool_pre_ping
+    )
+    register_sqlite_pragmas(engine.sync_engine, config.pragmas())
+    return engine
+
+class AsyncLibrary:
+    """
+    Library with the same operations as coroutines.
+
+    Every call runs the regular Library code on the async engine's
+    sync_engine inside AsyncSession.run_sync, so SQL I/O awaits the
+    aiosqlite driver instead of blocking the event loop, and both classes
+    always return the same results. At most `max_concurrency` calls run at
+    once; the others wait on a semaphore (the connection pool is sized to
+    match when built from a URL or EngineConfig).
+    """
+
+    def __init__(self, engine=None, max_concurrency: int = 10, **library_options):
+        """
+        `engine` may be an AsyncEngine, an async database URL
+        (e.g. 'sqlite+aiosqlite:///library.db') or an EngineConfig with such
+        a URL. `library_options` (cache_size, cache_ttl) go to Library.
+        """
+        if engine is None:
+            engine = DEFAULT_ASYNC_URL
+        if isinstance(engine, str):
+            engine = EngineConfig(url=engine)
+        if isinstance(engine, EngineConfig):
+            # Some Library methods hold two sessions at once (e.g. recommend_books
+            # calls get_user_preferred_genres), so allow two connections per call
+            engine = create_library_async_engine(EngineConfig(**{
+                **engine.__dict__, 'pool_size': max_concurrency, 'max_overflow': max_concurrency
+            }))
+        if not isinstance(engine, AsyncEngine):
+            raise TypeError(f"Expected AsyncEngine, URL or EngineConfig, got {type(engine).__name__}")
+        self.engine = engine
+        self.library = Library(engine.sync_engine, **library_options)
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._greenlet_sessions = async_sessionmaker(engine)
+
+    async def run(self, func, *args, **kwargs):
+        """Run a synchronous callable that uses self.library (or its engine) without blocking."""
+        async with self._semaphore:
+            # the session is only the public way into run_sync: it never
+            # connects, as the Library code checks out its own connections
+            async with self._greenlet_sessions() as session:
+                return await session.run_sync(lambda _: func(*args, **kwargs))
+
+    async def init_db(self):
+        """Drop and recreate every table, like db_init.init_db."""
+        await self.run(init_db, self.engine.sync_engine)
+
+    async def dispose(self):
+        """Remove the instrumentation hooks and close every pooled connection."""
+        self.library.close()
+        await self.engine.dispose()
+
+def _delegate(name):
+    method = getattr(Library, name)
+
+    @functools.wraps(method)
+    async def coroutine(self, *args, **kwargs):
+        return await self.run(getattr(self.library, name), *args, **kwargs)
+    return coroutine
+
+for _name in ASYNC_METHODS:
+    setattr(AsyncLibrary, _name, _delegate(_name))
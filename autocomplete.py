@@ -0,0 +1,121 @@
+"""
+Prefix autocomplete for Smart Library System.
+Path-compressed tries over normalized titles and authors whose nodes keep
+the top-k book ids by rating, so a suggestion costs O(prefix length + k).
+"""
+
+import heapq
+from normalization import normalize
+
+FIELDS = ('title', 'author')
+
+DEFAULT_TOP_K = 10
+
+class _Node:
+    __slots__ = ('label', 'children', 'top')
+
+    def __init__(self, label: str, top: list):
+        self.label = label # edge label from the parent
+        self.children = {} # first character of the child's label -> child
+        self.top = top # (-rating, id) of the best books in the subtree, best first
+
+class PrefixTrie:
+    """
+    Radix trie from strings to book ids.
+
+    Every node keeps the ids of the `k` best books of its subtree ranked by
+    (rating descending, id ascending), maintained on insert, so the answer
+    for a prefix is the list of the node where the prefix ends.
+    """
+
+    def __init__(self, k: int = DEFAULT_TOP_K):
+        self.root = _Node('', [])
+        self.k = k
+
+    def _offer(self, node: _Node, rank: tuple):
+        """Put `rank` into the node's top list if it is among the k best."""
+        top = node.top
+        if len(top) < self.k:
+            if not top or rank > top[-1]:
+                top.append(rank)
+                return
+        elif rank >= top[-1]:
+            return
+        else:
+            top.pop()
+        position = len(top)
+        while position and top[position - 1] > rank:
+            position -= 1
+        top.insert(position, rank)
+
+    def insert(self, key: str, book_id: int, rating: float):
+        """Add `book_id` under `key`."""
+        rank = (-rating, book_id)
+        node = self.root
+        self._offer(node, rank)
+        while key:
+            child = node.children.get(key[0])
+            if child is None:
+                node.children[key[0]] = _Node(key, [rank])
+                return
+            label = child.label
+            common = 1
+            limit = min(len(label), len(key))
+            while common < limit and label[common] == key[common]:
+                common += 1
+            if common < len(label):
+                # split the edge: the new middle node inherits the child's subtree ranking
+                middle = _Node(label[:common], list(child.top))
+                child.label = label[common:]
+                middle.children[child.label[0]] = child
+                node.children[key[0]] = middle
+                child = middle
+            self._offer(child, rank)
+            node = child
+            key = key[common:]
+
+    def top(self, prefix: str) -> list[tuple]:
+        """(-rating, id) of the k best books whose key starts with `prefix`."""
+        node = self.root
+        while prefix:
+            child = node.children.get(prefix[0])
+            if child is None:
+                return []
+            label = child.label
+            if len(prefix) <= len(label):
+                return child.top if label.startswith(prefix) else []
+            if not prefix.startswith(label):
+                return []
+            prefix = prefix[len(label):]
+            node = child
+        return node.top
+
+class AutocompleteIndex:
+    """One PrefixTrie per field over normalized titles and authors."""
+
+    def __init__(self, k: int = DEFAULT_TOP_K):
+        self.k = k
+        self.size = 0
+        self.tries = {field: PrefixTrie(k) for field in FIELDS}
+
+    def __len__(self):
+        return self.size
+
+    def add(self, book_id: int, title: str, author: str, rating: float):
+        """Index one book."""
+        self.size += 1
+        self.tries['title'].insert(normalize(title), book_id, rating)
+        self.tries['author'].insert(normalize(author), book_id, rating)
+
+    def suggest(self, prefix: str, limit: int = None, fields=None) -> list[int]:
+        """
+        Ids of the best-rated books whose normalized title or author starts
+        with the normalized `prefix`, best first (at most k).
+        """
+        limit = self.k if limit is None else min(limit, self.k)
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        lists = [self.tries[field].top(prefix) for field in (fields or FIELDS)]
+        merged = lists[0] if len(lists) == 1 else heapq.merge(*lists)
+        return list(dict.fromkeys(book_id for rating, book_id in merged))[:limit]
@@ -0,0 +1,93 @@
+"""
+Requests/sec of AsyncLibrary versus the sync Library in a thread pool,
+at 1, 10 and 100 concurrent clients.
+
+Both use the same tuned SQLite file (WAL) and a connection pool sized to
+the concurrency. The request mix is mostly reads (full-text search,
+recommendations, profiles, top-rated) with some borrowings.
+
+Run from the project root:  python -m benchmarks.async_library [N_BOOKS]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from async_library import AsyncLibrary
+from benchmarks.engine import synthetic_books
+from db_init import EngineConfig, init_db, resolve_engine
+from library import Library
+
+N_USERS = 1000
+CONCURRENCY = (1, 10, 100)
+
+def request_mix(n):
+    """The i-th request as (method name, args), cycling through the mix."""
+    requests = []
+    for i in range(n):
+        user_id = i % N_USERS + 1
+        kind = i % 10
+        if kind < 3:
+            requests.append(('search_books', ('ab',), {'mode': 'fts', 'limit': 10}))
+        elif kind < 6:
+            requests.append(('recommend_books', (user_id,), {}))
+        elif kind < 8:
+            requests.append(('get_user_reading_profile', (user_id,), {}))
+        elif kind < 9:
+            requests.append(('get_top_rated_books', (10,), {}))
+        else:
+            requests.append(('borrow_book', (user_id, i % 5000 + 1), {}))
+    return requests
+
+def setup(path, n_books):
+    engine = resolve_engine(EngineConfig.tuned('sqlite:///' + path))
+    init_db(engine)
+    library = Library(engine)
+    library.bulk_add_books(synthetic_books(n_books))
+    library.bulk_add_users({'name': f'user{i}'} for i in range(N_USERS))
+    for i in range(N_USERS * 3):
+        library.borrow_book(i % N_USERS + 1, (i * 7) % n_books + 1)
+    engine.dispose()
+
+def run_sync(path, concurrency, requests):
+    config = EngineConfig.tuned('sqlite:///' + path, pool_size=concurrency, max_overflow=concurrency)
+    library = Library(config)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        list(pool.map(lambda r: getattr(library, r[0])(*r[1], **r[2]), requests))
+        elapsed = time.perf_counter() - start
+    library.engine.dispose()
+    return len(requests) / elapsed
+
+async def run_async(path, concurrency, requests):
+    library = AsyncLibrary(EngineConfig.tuned('sqlite+aiosqlite:///' + path), max_concurrency=concurrency)
+    queue = iter(requests)
+
+    async def client():
+        for name, args, kwargs in queue:
+            await getattr(library, name)(*args, **kwargs)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    await library.dispose()
+    return len(requests) / elapsed
+
+def main():
+    n_books = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        setup(path, n_books)
+        print(f"\n=== AsyncLibrary vs Library in a thread pool ({n_books} books) ===\n")
+        print(f"{'clients':>8} {'sync req/s':>12} {'async req/s':>12}")
+        for concurrency in CONCURRENCY:
+            requests = request_mix(max(200, concurrency * 10))
+            sync_rps = run_sync(path, concurrency, requests)
+            async_rps = asyncio.run(run_async(path, concurrency, requests))
+            print(f"{concurrency:>8} {sync_rps:>12.1f} {async_rps:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Per-keystroke latency of Library.autocomplete versus a LIKE 'prefix%'
+query ordered by rating, on a catalog of generated books.
+
+Run from the project root:  python -m benchmarks.autocomplete [N_BOOKS]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import or_
+from datagen import load_library
+from db_init import close_session, init_db, resolve_engine
+from library import Library
+from models.book import Book
+
+def keystrokes(library, n_queries: int, seed: int = 0) -> list[str]:
+    """Every prefix (1 to 12 characters) of the titles/authors of some random books."""
+    rng = np.random.default_rng(seed)
+    books = library.get_all_books(lean=True)
+    prefixes = []
+    for index in rng.integers(0, len(books), size=n_queries):
+        value = books[index]['title' if len(prefixes) % 2 else 'author']
+        prefixes.extend(value[:length] for length in range(1, min(len(value), 12) + 1))
+    return prefixes
+
+def like_prefix(library, prefix: str, limit: int = 10) -> list[dict]:
+    """The SQL way: case-insensitive LIKE 'prefix%' on title or author, best rated first."""
+    session = library.get_session()
+    try:
+        pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        books = session.query(Book).filter(
+            or_(Book.title.ilike(pattern, escape='\\'), Book.author.ilike(pattern, escape='\\'))
+        ).order_by(Book.rating.desc(), Book.id).limit(limit).all()
+        return [book.to_dict() for book in books]
+    finally:
+        close_session(session)
+
+def percentiles(times: list[float]) -> str:
+    p50, p95, p99 = np.percentile(times, [50, 95, 99])
+    return f"p50 {p50:8.3f} ms   p95 {p95:8.3f} ms   p99 {p99:8.3f} ms"
+
+def main():
+    n_books = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        engine = resolve_engine('sqlite:///' + os.path.join(directory, 'autocomplete.db'))
+        init_db(engine)
+        library = Library(engine, instrument=False)
+        load_library(library, n_books=n_books)
+        print(f"=== Autocomplete benchmark: {n_books} books ===\n")
+
+        prefixes = keystrokes(library, 200)
+        start = time.perf_counter()
+        library.rebuild_autocomplete_index()
+        build = time.perf_counter() - start
+        print(f"Index build: {build:.1f} s\n")
+
+        for label, func, queries in [
+            ("autocomplete", library.autocomplete, prefixes),
+            # a full scan per keystroke: time a sample only
+            ("LIKE 'prefix%'", lambda prefix: like_prefix(library, prefix), prefixes[::20]),
+        ]:
+            times = []
+            for prefix in queries:
+                start = time.perf_counter()
+                func(prefix)
+                times.append((time.perf_counter() - start) * 1000)
+            print(f"{label:<16} {len(queries):5} keystrokes   {percentiles(times)}")
+
+        start = time.perf_counter()
+        for i in range(1000):
+            library.add_book(f"Autocomplete Bench {i}", "Bench Author", "Fiction", 2024, 4.5)
+        # 1000 calls: total seconds == milliseconds per call
+        print(f"\nadd_book with the index loaded: {time.perf_counter() - start:.3f} ms per call")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
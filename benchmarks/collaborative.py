@@ -0,0 +1,70 @@
+"""
+Item-item collaborative filtering on synthetic borrowing histories.
+
+Popularity of books is Zipf-like and activity per user is skewed, roughly
+like a real library. Reports fit time, single-user and batch serving
+latency, and the cost of an incremental borrow_book update (and of the
+deferred neighbor refresh it leaves to the next recommendation).
+
+Run from the project root:  python -m benchmarks.collaborative [N_USERS]
+"""
+
+import sys
+import time
+import statistics
+import numpy as np
+
+from collaborative import ItemItemRecommender
+
+def synthetic_borrowings(n_users, n_books, mean_history=15, seed=0):
+    """(user_ids, book_ids) arrays of synthetic borrowings."""
+    rng = np.random.default_rng(seed)
+    lengths = np.maximum(1, rng.lognormal(np.log(mean_history) - 0.5, 1.0, n_users).astype(np.int64))
+    popularity = 1.0 / np.arange(1, n_books + 1) ** 0.8
+    popularity /= popularity.sum()
+    user_ids = np.repeat(np.arange(1, n_users + 1), lengths)
+    book_ids = rng.choice(n_books, size=len(user_ids), p=popularity) + 1
+    return user_ids, book_ids
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def main():
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    n_books = 20000
+    user_ids, book_ids = synthetic_borrowings(n_users, n_books)
+    print(f"=== Item-item CF: {n_users} users, {n_books} books, {len(user_ids)} borrowings ===\n")
+
+    model, seconds = timed(lambda: ItemItemRecommender(neighbors=50).fit(user_ids, book_ids))
+    print(f"Fit (neighbors=50): {seconds:.2f} seconds")
+
+    rng = np.random.default_rng(1)
+    sample = rng.integers(1, n_users + 1, size=1000).tolist()
+    latencies = []
+    for user_id in sample:
+        _, seconds = timed(lambda: model.recommend(user_id, 10))
+        latencies.append(seconds * 1000)
+    print(f"Single user top-10: median {statistics.median(latencies):.3f} ms, "
+          f"p95 {sorted(latencies)[949]:.3f} ms")
+
+    batch = rng.integers(1, n_users + 1, size=10000).tolist()
+    _, seconds = timed(lambda: model.recommend_batch(batch, 10))
+    print(f"Batch top-10 for {len(batch)} users: {seconds:.2f} seconds ({len(batch) / seconds:.0f} users/sec)")
+
+    updates = []
+    for user_id, book_id in zip(sample[:200], rng.integers(1, n_books + 1, size=200).tolist()):
+        _, seconds = timed(lambda: model.record_borrow(user_id, book_id))
+        updates.append(seconds * 1000)
+    print(f"Incremental borrow update: median {statistics.median(updates):.3f} ms, max {max(updates):.3f} ms")
+
+    # the dirty neighbor lists are recomputed by the next recommendation that reads them
+    refreshes = []
+    for user_id in sample[:200]:
+        _, seconds = timed(lambda: model.recommend(user_id, 10))
+        refreshes.append(seconds * 1000)
+    print(f"First top-10 after a borrow: median {statistics.median(refreshes):.3f} ms, max {max(refreshes):.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Per-call latency of Library methods with the default engine versus a
+tuned one (connection pool + SQLite WAL/cache/mmap pragmas).
+
+Run from the project root:  python -m benchmarks.engine [N_BOOKS]
+"""
+
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+import statistics
+
+from db_init import EngineConfig, init_db, resolve_engine
+from library import Library
+
+GENRES = ['Fiction', 'Science', 'History', 'Art', 'Music', 'Business', 'Technology', 'Programming']
+
+def synthetic_books(n, seed=0):
+    """Random books in the books.json format."""
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield {
+            'title': ''.join(rng.choices(string.ascii_letters, k=8)),
+            'author': ''.join(rng.choices(string.ascii_letters, k=10)),
+            'genre': rng.choice(GENRES),
+            'year': rng.randint(1900, 2024),
+            'rating': round(rng.uniform(1, 5), 1)
+        }
+
+def latency(func, calls):
+    """Run `func(i)` `calls` times; return per-call times in milliseconds."""
+    times = []
+    for i in range(calls):
+        start = time.perf_counter()
+        func(i)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+def report(label, times):
+    times = sorted(times)
+    p95 = times[int(len(times) * 0.95) - 1]
+    print(f"  {label:<22} median {statistics.median(times):8.3f} ms   p95 {p95:8.3f} ms")
+
+def run(label, source, n_books, n_users, calls):
+    engine = resolve_engine(source)
+    init_db(engine)
+    library = Library(engine)
+    library.bulk_add_books(synthetic_books(n_books))
+    library.bulk_add_users({'name': f'user{i}'} for i in range(n_users))
+    print(f"{label}:")
+    report('get_top_rated_books', latency(lambda i: library.get_top_rated_books(10), calls))
+    report('borrow_book', latency(lambda i: library.borrow_book(i % n_users + 1, i % n_books + 1), calls))
+    engine.dispose()
+
+def main():
+    n_books = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    n_users, calls = 1000, 200
+    with tempfile.TemporaryDirectory() as directory:
+        default_url = 'sqlite:///' + os.path.join(directory, 'default.db')
+        tuned_url = 'sqlite:///' + os.path.join(directory, 'tuned.db')
+        print(f"=== Engine benchmark: {n_books} books, {calls} calls per method ===\n")
+        run("Default engine", default_url, n_books, n_users, calls)
+        run("Tuned engine (WAL, synchronous=NORMAL, 64MB cache, mmap, temp_store=MEMORY)",
+            EngineConfig.tuned(tuned_url), n_books, n_users, calls)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Time and peak memory of catalog-wide reads through ORM entities versus
+the lean path (Core rows turned into dicts or BookRecord tuples).
+
+Run from the project root:  python -m benchmarks.lean_reads [N_BOOKS]
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.engine import synthetic_books
+from db_init import init_db, resolve_engine
+from library import Library
+
+def measure(func):
+    """(seconds, peak MB, result length) of one call of `func`."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 2**20, len(result)
+
+def compare(label, calls):
+    print(f"{label}:")
+    baseline = None
+    for name, func in calls:
+        # tracemalloc slows allocation-heavy code, so time a separate untraced run
+        _, peak, rows = measure(func)
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        baseline = baseline or seconds
+        print(f"  {name:<10} {seconds:7.2f} s   {rows / seconds:>11,.0f} rows/s   "
+              f"peak {peak:8.1f} MB   ({baseline / seconds:.1f}x)")
+
+def main():
+    n_books = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        engine = resolve_engine('sqlite:///' + os.path.join(directory, 'lean.db'))
+        init_db(engine)
+        library = Library(engine, instrument=False)
+        library.bulk_add_books(synthetic_books(n_books))
+        print(f"=== Lean read benchmark: {n_books} books ===\n")
+        compare("get_all_books", [
+            ('orm', library.get_all_books),
+            ('lean', lambda: library.get_all_books(lean=True)),
+            ('records', lambda: library.get_all_books(records=True)),
+        ])
+        compare("search_books('a') (broad LIKE)", [
+            ('orm', lambda: library.search_books('a')),
+            ('lean', lambda: library.search_books('a', lean=True)),
+            ('records', lambda: library.search_books('a', records=True)),
+        ])
+        compare("naive_search_books('ab')", [
+            ('orm', lambda: library.naive_search_books('ab')),
+            ('lean', lambda: library.naive_search_books('ab', lean=True)),
+        ])
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
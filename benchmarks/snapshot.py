@@ -0,0 +1,60 @@
+"""
+Export, load and scan times of the columnar catalog snapshot versus the
+same reads through SQLite.
+
+Run from the project root:  python -m benchmarks.snapshot [N_BOOKS]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text
+from benchmarks.engine import synthetic_books
+from db_init import init_db, resolve_engine
+from library import Library
+from snapshot import load_snapshot
+
+def timed(func):
+    """(result, milliseconds) of one call of `func`."""
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    n_books = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        engine = resolve_engine('sqlite:///' + os.path.join(directory, 'snapshot.db'))
+        init_db(engine)
+        library = Library(engine, instrument=False)
+        library.bulk_add_books(synthetic_books(n_books))
+        path = os.path.join(directory, 'catalog')
+        print(f"=== Snapshot benchmark: {n_books} books ===\n")
+
+        _, ms = timed(lambda: library.export_snapshot(path))
+        print(f"export_snapshot                {ms:10.1f} ms")
+        catalog, ms = timed(lambda: load_snapshot(path))
+        print(f"load_snapshot                  {ms:10.3f} ms\n")
+
+        def genre_sql():
+            with engine.connect() as connection:
+                return dict(connection.execute(text("SELECT genre, COUNT(*) FROM books GROUP BY genre")).all())
+
+        def average_sql():
+            with engine.connect() as connection:
+                return connection.execute(text("SELECT AVG(rating) FROM books")).scalar()
+
+        for label, sql, columnar in [
+            ("genre counts", genre_sql, catalog.genre_counts),
+            ("average rating", average_sql, catalog.average_rating),
+            ("top 10 rated", lambda: library.get_top_rated_books(10, lean=True), lambda: catalog.top_rated(10)),
+            ("naive search 'ab'", lambda: library.naive_search_books('ab', lean=True), lambda: catalog.search('ab')),
+        ]:
+            _, sql_ms = timed(sql)
+            _, columnar_ms = timed(columnar)
+            print(f"{label:<20} SQLite {sql_ms:9.1f} ms   snapshot {columnar_ms:9.1f} ms   ({sql_ms / columnar_ms:.1f}x)")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Benchmark suite timing every public Library method.
+
+For each dataset size a template SQLite file is populated with synthetic
+books, users and borrowings and cloned for the run; every benchmark then runs
+`warmup` untimed calls and `repeat` timed calls, each after its untimed
+SETUP (e.g. return_book first borrows the book it returns). Benchmarks that
+write are followed by a fresh clone, so every read runs on exactly N books.
+Results carry mean/std/min/max and p50/p95/p99 in seconds, are written to
+JSON and to one CSV per benchmark (same columns as expr/test.py, so
+expr/fit.py and expr/pro_data.py can read them), and can be compared with a
+stored baseline.
+
+Run from the project root:
+    python -m benchmarks.suite --sizes 1000 10000 --repeat 20 --out bench_results
+    python -m benchmarks.suite --baseline bench_results/baseline.json --threshold 0.25
+"""
+
+import argparse
+import collections
+import csv
+import inspect
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from sqlalchemy import text
+from benchmarks.engine import GENRES, synthetic_books
+from db_init import resolve_engine
+from fixtures import clone_database, template_database
+from library import Library
+from pagination import encode_cursor
+
+# name -> (Library method, function(context, i) -> (args, kwargs))
+BENCHMARKS = {
+    'add_book': ('add_book', lambda ctx, i: (("Bench Book", "Bench Author", "Programming", 2024, 4.0), {})),
+    'bulk_add_books': ('bulk_add_books', lambda ctx, i: ((list(synthetic_books(1000, seed=i)),), {})),
+    'get_all_books': ('get_all_books', lambda ctx, i: ((), {})),
+    'get_all_books[lean]': ('get_all_books', lambda ctx, i: ((), {'lean': True})),
+    'iter_books': ('iter_books', lambda ctx, i: ((), {})),
+    'get_books_page': ('get_books_page', lambda ctx, i: ((encode_cursor('books', ctx.book(i)),), {})),
+    'export_snapshot': ('export_snapshot', lambda ctx, i: ((os.path.join(ctx.directory, f'snapshot{i}'),), {})),
+    'naive_search_books': ('naive_search_books', lambda ctx, i: ((ctx.keyword(i),), {})),
+    'search_books': ('search_books', lambda ctx, i: ((ctx.keyword(i),), {})),
+    'iter_search': ('iter_search', lambda ctx, i: ((ctx.keyword(i),), {})),
+    'search_books[fts]': ('search_books', lambda ctx, i: ((ctx.word(i),), {'mode': 'fts'})),
+    'search_books[trigram]': ('search_books', lambda ctx, i: ((ctx.keyword(i),), {'mode': 'trigram'})),
+    'faceted_search': ('faceted_search', lambda ctx, i: ((), {'genres': [GENRES[i % len(GENRES)]], 'min_rating': 4.0})),
+    'faceted_search[years]': ('faceted_search', lambda ctx, i: ((), {'year_min': 1990 + i % 20, 'year_max': 1999 + i % 20})),
+    'fts_search_books': ('fts_search_books', lambda ctx, i: ((ctx.word(i),), {'limit': 10})),
+    'trigram_search_books': ('trigram_search_books', lambda ctx, i: ((ctx.keyword(i),), {'limit': 10})),
+    'search_books[prefix]': ('search_books', lambda ctx, i: ((ctx.word(i)[:3].upper(),), {'mode': 'prefix', 'limit': 10})),
+    'search_books[exact]': ('search_books', lambda ctx, i: ((ctx.word(i).lower(),), {'mode': 'exact', 'fields': ['title']})),
+    'search_books[fuzzy]': ('search_books', lambda ctx, i: ((ctx.typo(i),), {'mode': 'fuzzy', 'limit': 10})),
+    'fuzzy_search_books': ('fuzzy_search_books', lambda ctx, i: ((ctx.typo(i),), {'max_distance': 1, 'limit': 10})),
+    'rebuild_trigram_index': ('rebuild_trigram_index', lambda ctx, i: ((), {})),
+    'rebuild_fuzzy_index': ('rebuild_fuzzy_index', lambda ctx, i: ((), {})),
+    'autocomplete': ('autocomplete', lambda ctx, i: ((ctx.word(i)[:1 + i % 4],), {})),
+    'rebuild_autocomplete_index': ('rebuild_autocomplete_index', lambda ctx, i: ((), {})),
+    'rebuild_search_index': ('rebuild_search_index', lambda ctx, i: ((), {})),
+    'get_top_rated_books': ('get_top_rated_books', lambda ctx, i: ((10,), {})),
+    'add_user': ('add_user', lambda ctx, i: ((f"bench-user-{ctx.unique()}",), {})),
+    'bulk_add_users': ('bulk_add_users', lambda ctx, i: (([{'name': f"bench-user-{ctx.unique()}"} for _ in range(1000)],), {})),
+    'get_all_users': ('get_all_users', lambda ctx, i: ((), {})),
+    'iter_users': ('iter_users', lambda ctx, i: ((), {})),
+    'get_users_page': ('get_users_page', lambda ctx, i: ((encode_cursor('users', ctx.user(i)),), {})),
+    'borrow_book': ('borrow_book', lambda ctx, i: ((ctx.user(i), ctx.book(i)), {})),
+    'return_book': ('return_book', lambda ctx, i: ((ctx.user(i), ctx.book(i)), {})),
+    'bulk_add_borrowings': ('bulk_add_borrowings', lambda ctx, i: (([{'user_id': ctx.user(i + k), 'book_id': ctx.book(i + k)} for k in range(100)],), {})),
+    'get_user_borrowed_books': ('get_user_borrowed_books', lambda ctx, i: ((ctx.user(i),), {})),
+    'get_statistics': ('get_statistics', lambda ctx, i: ((), {})),
+    'get_genre_counts': ('get_genre_counts', lambda ctx, i: ((), {})),
+    'reconcile_statistics': ('reconcile_statistics', lambda ctx, i: ((), {})),
+    'get_user_preferred_genres': ('get_user_preferred_genres', lambda ctx, i: ((ctx.user(i),), {})),
+    'recommend_books': ('recommend_books', lambda ctx, i: ((ctx.user(i),), {})),
+    'recommend_books[index]': ('recommend_books', lambda ctx, i: ((ctx.user(i),), {'mode': 'index'})),
+    'recommend_books[collaborative]': ('recommend_books', lambda ctx, i: ((ctx.user(i),), {'mode': 'collaborative'})),
+    'indexed_recommend_books': ('indexed_recommend_books', lambda ctx, i: ((ctx.user(i),), {})),
+    'rebuild_recommendation_index': ('rebuild_recommendation_index', lambda ctx, i: ((), {})),
+    'build_collaborative_model': ('build_collaborative_model', lambda ctx, i: ((), {})),
+    'collaborative_recommend_books': ('collaborative_recommend_books', lambda ctx, i: ((ctx.user(i),), {})),
+    'cache_stats': ('cache_stats', lambda ctx, i: ((), {})),
+    'get_user_reading_profile': ('get_user_reading_profile', lambda ctx, i: ((ctx.user(i),), {})),
+    'get_borrowed_books_for_users': ('get_borrowed_books_for_users', lambda ctx, i: ((ctx.users(i, 100),), {})),
+    'get_preferred_genres_for_users': ('get_preferred_genres_for_users', lambda ctx, i: ((ctx.users(i, 100),), {})),
+    'get_reading_profiles': ('get_reading_profiles', lambda ctx, i: ((ctx.users(i, 100),), {})),
+}
+
+# name -> function(library, context, i) run untimed before call i
+SETUP = {
+    # open the loan that call i returns (the clone has none for these pairs)
+    'return_book': lambda library, ctx, i: library.borrow_book(ctx.user(i), ctx.book(i)),
+}
+
+# name -> result every call must return (False would mean nothing was written)
+EXPECTED_RESULTS = {'borrow_book': True, 'return_book': True}
+
+# Benchmarks that add rows; the database is restored from the template after each
+WRITE_BENCHMARKS = frozenset({
+    'add_book', 'bulk_add_books', 'add_user', 'bulk_add_users',
+    'borrow_book', 'return_book', 'bulk_add_borrowings',
+})
+
+# Legacy CSV names read by expr/fit.py and expr/pro_data.py
+CSV_ALIASES = {'naive_search_books': 'nv', 'search_books': 'ad'}
+
+class Context:
+    """Deterministic arguments for benchmark calls on a populated database."""
+
+    def __init__(self, n_books, n_users, directory, seed=0):
+        self.n_books = n_books
+        self.n_users = n_users
+        self.rng = random.Random(seed)
+        self.counter = 0
+        self.directory = directory
+        words = [book['title'] for book in synthetic_books(min(n_books, 1000), seed=seed)]
+        self.words = words or ['Python']
+
+    def keyword(self, i):
+        """A 3-letter substring of some title."""
+        return self.words[i % len(self.words)][1:4]
+
+    def word(self, i):
+        """A whole title token (for full-text search)."""
+        return self.words[i % len(self.words)]
+
+    def typo(self, i):
+        """A title token with two adjacent letters swapped (for fuzzy search)."""
+        word = self.word(i)
+        k = i % max(len(word) - 1, 1)
+        return word[:k] + word[k + 1:k + 2] + word[k:k + 1] + word[k + 2:]
+
+    def user(self, i):
+        return i % self.n_users + 1
+
+    def users(self, i, n):
+        return [(i * n + k) % self.n_users + 1 for k in range(n)]
+
+    def book(self, i):
+        return (i * 7919) % self.n_books + 1
+
+    def unique(self):
+        self.counter += 1
+        return f"{self.counter}-{self.rng.random():.12f}"
+
+def uncovered_methods():
+    """Public Library methods no benchmark exercises."""
+    covered = {method for method, _ in BENCHMARKS.values()}
+    public = {name for name, _ in inspect.getmembers(Library, inspect.isfunction) if not name.startswith('_')}
+    return sorted(public - covered - {'get_session', 'close', 'metrics', 'reset_metrics'})
+
+def populate(library, n_books, n_users, borrowings_per_user=5, seed=0):
+    """Fill an empty database with synthetic books, users and borrowings."""
+    library.bulk_add_books(synthetic_books(n_books, seed=seed))
+    library.bulk_add_users({'name': f'user{i}'} for i in range(n_users))
+    rng = random.Random(seed)
+    for user_id in range(1, n_users + 1):
+        for _ in range(borrowings_per_user):
+            library.borrow_book(user_id, rng.randint(1, n_books))
+
+def summarize(name, size, times) -> dict:
+    """Summary statistics (seconds) of a list of call durations."""
+    times = np.asarray(times)
+    p50, p95, p99 = np.percentile(times, [50, 95, 99])
+    return {
+        'benchmark': name,
+        'value': size,
+        'repeat': len(times),
+        'mean_time': float(times.mean()),
+        'std_time': float(times.std()),
+        'min_time': float(times.min()),
+        'max_time': float(times.max()),
+        'p50_time': float(p50),
+        'p95_time': float(p95),
+        'p99_time': float(p99)
+    }
+
+def setup_benchmark(library, context, name, i):
+    """Prepare call `i` of benchmark `name` (see SETUP)."""
+    setup = SETUP.get(name)
+    if setup is not None:
+        setup(library, context, i)
+
+def call_benchmark(library, context, name, i):
+    """Run benchmark `name` once (generators are consumed); RuntimeError on an unexpected result."""
+    method_name, make_args = BENCHMARKS[name]
+    args, kwargs = make_args(context, i)
+    result = getattr(library, method_name)(*args, **kwargs)
+    if inspect.isgenerator(result):
+        collections.deque(result, maxlen=0)
+    if name in EXPECTED_RESULTS and result != EXPECTED_RESULTS[name]:
+        raise RuntimeError(f"{name} call {i} returned {result!r}, expected {EXPECTED_RESULTS[name]!r}")
+    return result
+
+def time_benchmark(library, context, name, warmup, repeat) -> list:
+    """Durations of `repeat` timed calls after `warmup` untimed ones (setup is never timed)."""
+    for i in range(warmup):
+        setup_benchmark(library, context, name, i)
+        call_benchmark(library, context, name, i)
+    times = []
+    for i in range(warmup, warmup + repeat):
+        setup_benchmark(library, context, name, i)
+        start = time.perf_counter()
+        call_benchmark(library, context, name, i)
+        times.append(time.perf_counter() - start)
+    return times
+
+def check_size(engine, n_books, n_users):
+    """Raise RuntimeError unless the database holds exactly n_books books and n_users users."""
+    with engine.connect() as connection:
+        books = connection.execute(text("SELECT COUNT(*) FROM books")).scalar()
+        users = connection.execute(text("SELECT COUNT(*) FROM users")).scalar()
+    if (books, users) != (n_books, n_users):
+        raise RuntimeError(f"Expected {n_books} books and {n_users} users, found {books} and {users}")
+
+def run_suite(sizes, names=None, warmup=2, repeat=10, users_per_book=0.1, echo=True, cache_dir=None) -> list:
+    """
+    Run the selected benchmarks at every dataset size; return summary rows.
+
+    Each size's populated database is built once as a template (see
+    fixtures.template_database) and cloned; the clone is replaced after
+    every benchmark in WRITE_BENCHMARKS. With `cache_dir`, templates are
+    kept there and reused by later runs.
+    """
+    names = names or list(BENCHMARKS)
+    results = []
+    for size in sizes:
+        n_users = max(10, int(size * users_per_book))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.db')
+            key = {'data': 'benchmarks.suite.populate', 'n_books': size, 'n_users': n_users}
+            template = template_database(key, lambda library: populate(library, size, n_users), cache_dir or directory)
+
+            def fresh_library():
+                clone_database(template, path)
+                engine = resolve_engine('sqlite:///' + path)
+                return engine, Library(engine)
+
+            engine, library = fresh_library()
+            context = Context(size, n_users, directory)
+            for name in names:
+                if name not in WRITE_BENCHMARKS:
+                    check_size(engine, size, n_users)
+                row = summarize(name, size, time_benchmark(library, context, name, warmup, repeat))
+                results.append(row)
+                if echo:
+                    print(f"N={size:<9} {name:<32} p50 {row['p50_time'] * 1000:9.3f} ms"
+                          f"   p95 {row['p95_time'] * 1000:9.3f} ms   p99 {row['p99_time'] * 1000:9.3f} ms")
+                if name in WRITE_BENCHMARKS:
+                    library.close()
+                    engine.dispose()
+                    engine, library = fresh_library()
+            library.close()
+            engine.dispose()
+    return results
+
+def write_results(results, directory):
+    """results.json plus one results_<benchmark>.csv per benchmark."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'results.json'), 'w') as f:
+        json.dump(results, f, indent=2)
+    columns = ['value', 'mean_time', 'std_time', 'min_time', 'max_time', 'p50_time', 'p95_time', 'p99_time']
+    for name in dict.fromkeys(row['benchmark'] for row in results):
+        label = CSV_ALIASES.get(name, name.replace('[', '_').replace(']', ''))
+        with open(os.path.join(directory, f'results_{label}.csv'), 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(row for row in results if row['benchmark'] == name)
+
+def compare(results, baseline, threshold=0.2, metric='p50_time') -> list:
+    """
+    Regressions against `baseline` rows: (benchmark, size, old, new, ratio)
+    for every benchmark/size whose `metric` grew by more than `threshold`.
+    """
+    previous = {(row['benchmark'], row['value']): row for row in baseline}
+    regressions = []
+    for row in results:
+        old = previous.get((row['benchmark'], row['value']))
+        if old is None or old[metric] <= 0:
+            continue
+        ratio = row[metric] / old[metric]
+        if ratio > 1 + threshold:
+            regressions.append((row['benchmark'], row['value'], old[metric], row[metric], ratio))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--benchmarks', nargs='+', choices=list(BENCHMARKS), default=None)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--out', default='bench_results')
+    parser.add_argument('--baseline', help='results.json of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative slowdown of p50')
+    parser.add_argument('--fixture-cache', help='directory of reusable populated databases (e.g. .fixtures)')
+    parser.add_argument('--save-baseline', action='store_true', help='also write <out>/baseline.json')
+    args = parser.parse_args(argv)
+
+    missing = uncovered_methods()
+    if missing:
+        print(f"Warning: no benchmark for {', '.join(missing)}")
+    results = run_suite(args.sizes, args.benchmarks, args.warmup, args.repeat, cache_dir=args.fixture_cache)
+    write_results(results, args.out)
+    if args.save_baseline:
+        with open(os.path.join(args.out, 'baseline.json'), 'w') as f:
+            json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.out}/")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for name, size, old, new, ratio in regressions:
+            print(f"REGRESSION {name} N={size}: p50 {old * 1000:.3f} ms -> {new * 1000:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} of the baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
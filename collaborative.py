@@ -0,0 +1,255 @@
+"""
+Item-item collaborative filtering for Smart Library System.
+Vectorized with NumPy over a sparse (CSR) user x book borrowing matrix.
+"""
+
+import numpy as np
+from models.borrowing import Borrowing
+
+def _gather(indptr, indices, rows):
+    """Concatenate the CSR slices of `rows`; return (values, slice lengths)."""
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return indices[offsets + np.arange(lengths.sum())], lengths
+
+def _csr(rows, cols, n_rows):
+    """CSR (indptr, indices) of the pairs (rows, cols), rows sorted."""
+    order = np.lexsort((cols, rows))
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return indptr, cols[order].astype(np.int64)
+
+def _top_k_per_row(rows, cols, scores, k):
+    """Keep the `k` highest scores of every row; result sorted by row, then score."""
+    order = np.lexsort((-scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows, side='left')
+    keep = rank < k
+    return rows[keep], cols[keep], scores[keep]
+
+class ItemItemRecommender:
+    """
+    Cosine item-item model on implicit (borrowed / not borrowed) feedback.
+
+    fit() builds the user x book matrix in CSR and CSC form and computes, for
+    every book, its `neighbors` most similar books. Co-occurrence counts are
+    produced block by block, each block bounded to about `max_pairs`
+    (book, book) pairs, so the full similarity matrix is never materialized.
+
+    record_borrow() folds a new borrowing in without a refit: the user's
+    history, the co-occurrence counts and the borrowed book's neighbor list
+    are updated immediately; the user's other books are marked dirty and
+    their neighbor lists recomputed exactly when a recommendation reads
+    them (or by refresh()). Other books' similarities to the borrowed book
+    are refreshed on the next fit(). Books first seen after fit() are
+    ignored until then.
+    """
+
+    def __init__(self, neighbors: int = 50, max_pairs: int = 5_000_000):
+        self.neighbors = neighbors
+        self.max_pairs = max_pairs
+        self.book_ids = np.empty(0, dtype=np.int64)
+        self.user_rows = {}
+
+    # Building
+    def fit(self, user_ids, book_ids):
+        """Fit on parallel arrays of borrowings (repeat borrowings count once)."""
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        book_ids = np.asarray(book_ids, dtype=np.int64)
+        self.book_ids = np.unique(book_ids)
+        unique_users, rows = np.unique(user_ids, return_inverse=True)
+        cols = np.searchsorted(self.book_ids, book_ids)
+        n_users, n_items = len(unique_users), len(self.book_ids)
+
+        pairs = np.unique(rows.astype(np.int64) * n_items + cols)
+        rows, cols = pairs // n_items, pairs % n_items
+        self.user_rows = dict(zip(unique_users.tolist(), range(n_users)))
+        self.user_indptr, self.user_items = _csr(rows, cols, n_users)
+        self.item_indptr, self.item_users = _csr(cols, rows, n_items)
+        self.item_counts = np.diff(self.item_indptr).astype(np.float64)
+        self.extra_user_items = {} # user row -> set of columns borrowed since fit
+        self.extra_item_users = {} # column -> set of user rows borrowing it since fit
+        self.overrides = {} # column -> (neighbor columns, weights) recomputed since fit
+        self.dirty = set() # columns whose neighbor lists are stale since a record_borrow
+        self._compute_neighbors()
+        return self
+
+    def fit_from_session(self, session):
+        """Fit on every row of the borrowings table."""
+        rows = session.query(Borrowing.user_id, Borrowing.book_id).all()
+        data = np.array(rows, dtype=np.int64).reshape(-1, 2)
+        return self.fit(data[:, 0], data[:, 1])
+
+    def _compute_neighbors(self):
+        """Top-`neighbors` cosine neighbors of every book, in memory-bounded blocks."""
+        n_items = len(self.book_ids)
+        user_lengths = np.diff(self.user_indptr)
+        # Number of (book, book) pairs each book contributes to the co-occurrence counts
+        item_pairs = np.zeros(n_items, dtype=np.int64)
+        if len(self.item_users):
+            nonempty = np.diff(self.item_indptr) > 0
+            item_pairs[nonempty] = np.add.reduceat(user_lengths[self.item_users], self.item_indptr[:-1][nonempty])
+        cumulative = np.cumsum(item_pairs)
+
+        kept_rows, kept_cols, kept_weights = [], [], []
+        start = 0
+        while start < n_items:
+            done = cumulative[start - 1] if start else 0
+            stop = max(int(np.searchsorted(cumulative, done + self.max_pairs, side='right')), start + 1)
+            rows, cols, weights = self._block_neighbors(np.arange(start, min(stop, n_items)))
+            kept_rows.append(rows)
+            kept_cols.append(cols)
+            kept_weights.append(weights)
+            start = stop
+
+        rows = np.concatenate(kept_rows) if kept_rows else np.empty(0, dtype=np.int64)
+        self.neighbor_indptr = np.zeros(n_items + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_items), out=self.neighbor_indptr[1:])
+        self.neighbor_items = np.concatenate(kept_cols) if kept_cols else np.empty(0, dtype=np.int64)
+        self.neighbor_weights = (np.concatenate(kept_weights) if kept_weights else np.empty(0)).astype(np.float32)
+
+    def _block_neighbors(self, items):
+        """(rows, cols, weights) of the top neighbors of the columns `items`."""
+        n_items = len(self.book_ids)
+        users, counts = _gather(self.item_indptr, self.item_users, items)
+        owners = np.repeat(items, counts)
+        cols, lengths = _gather(self.user_indptr, self.user_items, users)
+        keys, co_counts = np.unique(np.repeat(owners, lengths) * n_items + cols, return_counts=True)
+        rows, cols = keys // n_items, keys % n_items
+        distinct = rows != cols
+        rows, cols, co_counts = rows[distinct], cols[distinct], co_counts[distinct]
+        weights = co_counts / np.sqrt(self.item_counts[rows] * self.item_counts[cols])
+        return _top_k_per_row(rows, cols, weights, self.neighbors)
+
+    # Incremental updates
+    def record_borrow(self, user_id: int, book_id: int) -> bool:
+        """Fold one new borrowing into the model; False if the book is unknown."""
+        col = int(np.searchsorted(self.book_ids, book_id))
+        if col >= len(self.book_ids) or self.book_ids[col] != book_id:
+            return False
+        row = self.user_rows.setdefault(user_id, len(self.user_rows))
+        history = self._user_columns(row)
+        if col in history:
+            return True
+        self.extra_user_items.setdefault(row, set()).add(col)
+        self.extra_item_users.setdefault(col, set()).add(row)
+        self.item_counts[col] += 1
+        self.overrides[col] = self._row_neighbors(col)
+        self.dirty.discard(col)
+        self.dirty.update(history.tolist())
+        return True
+
+    def refresh(self, columns=None):
+        """Recompute the dirty neighbor lists (only those among `columns` if given)."""
+        stale = self.dirty if columns is None else self.dirty.intersection(columns.tolist())
+        for col in list(stale):
+            self.overrides[col] = self._row_neighbors(col)
+            self.dirty.discard(col)
+
+    def _user_columns(self, row: int):
+        """Columns of every book user `row` has borrowed."""
+        if row < len(self.user_indptr) - 1:
+            columns = self.user_items[self.user_indptr[row]:self.user_indptr[row + 1]]
+        else:
+            columns = np.empty(0, dtype=np.int64)
+        extra = self.extra_user_items.get(row)
+        if extra:
+            columns = np.concatenate([columns, np.fromiter(extra, dtype=np.int64)])
+        return columns
+
+    def _row_neighbors(self, col: int):
+        """Exact top neighbors of one column, including post-fit borrowings."""
+        users = self.item_users[self.item_indptr[col]:self.item_indptr[col + 1]].tolist()
+        users += self.extra_item_users.get(col, ())
+        if not users:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        cols, co_counts = np.unique(np.concatenate([self._user_columns(u) for u in users]), return_counts=True)
+        distinct = cols != col
+        cols, co_counts = cols[distinct], co_counts[distinct]
+        weights = co_counts / np.sqrt(self.item_counts[col] * self.item_counts[cols])
+        order = np.argsort(-weights, kind='stable')[:self.neighbors]
+        return cols[order], weights[order].astype(np.float32)
+
+    # Serving
+    def _neighbors_of(self, columns):
+        """Concatenated (neighbor columns, weights) of `columns`."""
+        if not self.overrides:
+            cols, _ = _gather(self.neighbor_indptr, self.neighbor_items, columns)
+            weights, _ = _gather(self.neighbor_indptr, self.neighbor_weights, columns)
+            return cols, weights
+        cols, weights = [], []
+        for col in columns.tolist():
+            if col in self.overrides:
+                neighbor_cols, neighbor_weights = self.overrides[col]
+            else:
+                start, stop = self.neighbor_indptr[col], self.neighbor_indptr[col + 1]
+                neighbor_cols, neighbor_weights = self.neighbor_items[start:stop], self.neighbor_weights[start:stop]
+            cols.append(neighbor_cols)
+            weights.append(neighbor_weights)
+        return np.concatenate(cols), np.concatenate(weights)
+
+    def recommend(self, user_id: int, limit: int = 5) -> list[tuple]:
+        """Top `limit` (book_id, score) pairs for one user, best first."""
+        row = self.user_rows.get(user_id)
+        if row is None:
+            return []
+        history = self._user_columns(row)
+        if not len(history):
+            return []
+        if self.dirty:
+            self.refresh(history)
+        cols, weights = self._neighbors_of(history)
+        candidates, inverse = np.unique(cols, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights, minlength=len(candidates))
+        scores[np.isin(candidates, history)] = 0
+        positive = scores > 0
+        candidates, scores = candidates[positive], scores[positive]
+        if len(candidates) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            candidates, scores = candidates[top], scores[top]
+        order = np.lexsort((candidates, -scores))
+        return [(int(self.book_ids[c]), float(s)) for c, s in zip(candidates[order], scores[order])]
+
+    def recommend_batch(self, user_ids, limit: int = 5, max_cells: int = 1_000_000) -> dict:
+        """
+        Top `limit` (book_id, score) pairs for many users, as {user_id: [...]}.
+
+        Scores for a block of users are accumulated into one dense
+        (users x books) matrix of at most `max_cells` entries and ranked with
+        a single argpartition per block.
+        """
+        n_items = len(self.book_ids)
+        result = {user_id: [] for user_id in user_ids}
+        known = [user_id for user_id in result if user_id in self.user_rows]
+        block = max(1, max_cells // max(n_items, 1))
+        k = min(limit, n_items)
+        if self.overrides or self.dirty:
+            # Only after record_borrow(); rank each user on its own
+            for user_id in known:
+                result[user_id] = self.recommend(user_id, limit)
+            return result
+        for start in range(0, len(known), block):
+            block_users = known[start:start + block]
+            histories = [self._user_columns(self.user_rows[user_id]) for user_id in block_users]
+            lengths = np.array([len(h) for h in histories])
+            if not lengths.sum() or not k:
+                continue
+            history = np.concatenate(histories)
+            owners = np.repeat(np.arange(len(block_users)), lengths)
+            cols, counts = _gather(self.neighbor_indptr, self.neighbor_items, history)
+            weights, _ = _gather(self.neighbor_indptr, self.neighbor_weights, history)
+            scores = np.bincount(
+                np.repeat(owners, counts) * n_items + cols, weights=weights,
+                minlength=len(block_users) * n_items
+            ).reshape(len(block_users), n_items)
+            scores[owners, history] = 0
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            for i, user_id in enumerate(block_users):
+                order = np.lexsort((top[i], -top_scores[i]))
+                result[user_id] = [
+                    (int(self.book_ids[c]), float(s))
+                    for c, s in zip(top[i][order], top_scores[i][order]) if s > 0
+                ]
+        return result
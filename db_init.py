@@ -3,7 +3,9 @@ Database initialization for Smart Library System.
 Simple ORM setup using SQLAlchemy.
 """
 
-from sqlalchemy import create_engine
+from dataclasses import dataclass
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -11,14 +13,113 @@ from datetime import datetime
 # Create base class for all models
 Base = declarative_base()
 
+DEFAULT_URL = 'sqlite:///library.db'
+
+@dataclass
+class EngineConfig:
+    """
+    Engine settings for a Library.
+
+    Pool settings are passed to create_engine (ignored for in-memory SQLite,
+    which does not use a QueuePool). SQLite pragmas left as None keep SQLite's
+    defaults; the others are applied to every new connection.
+    """
+    url: str = DEFAULT_URL
+    echo: bool = False
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+    journal_mode: str = None # e.g. 'WAL'
+    synchronous: str = None # e.g. 'NORMAL'
+    cache_size: int = None # pages, or KiB if negative
+    mmap_size: int = None # bytes
+    temp_store: str = None # e.g. 'MEMORY'
+
+    @classmethod
+    def tuned(cls, url: str = DEFAULT_URL, **overrides):
+        """Settings for a single-writer SQLite file favouring throughput."""
+        settings = dict(
+            journal_mode='WAL',
+            synchronous='NORMAL',
+            cache_size=-64000, # 64 MB
+            mmap_size=256 * 1024 * 1024,
+            temp_store='MEMORY'
+        )
+        settings.update(overrides)
+        return cls(url=url, **settings)
+
+    def pragmas(self) -> dict:
+        """SQLite pragmas to set on connect."""
+        names = ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store')
+        return {name: getattr(self, name) for name in names if getattr(self, name) is not None}
+
+def create_library_engine(config: EngineConfig) -> Engine:
+    """Create an engine from an EngineConfig, registering SQLite pragmas."""
+    options = {'echo': config.echo}
+    url = make_url(config.url)
+    in_memory = url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+    if not in_memory:
+        options.update(
+            pool_size=config.pool_size,
+            max_overflow=config.max_overflow,
+            pool_timeout=config.pool_timeout,
+            pool_recycle=config.pool_recycle,
+            pool_pre_ping=config.pool_pre_ping
+        )
+    new_engine = create_engine(url, **options)
+    register_sqlite_pragmas(new_engine, config.pragmas())
+    return new_engine
+
+def register_sqlite_pragmas(bind: Engine, pragmas: dict):
+    """Apply `pragmas` to every new SQLite connection of `bind`."""
+    if not pragmas or bind.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(bind, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def resolve_engine(source=None) -> Engine:
+    """Accept an Engine, a database URL, an EngineConfig, or None (the default engine)."""
+    if source is None:
+        return engine
+    if isinstance(source, Engine):
+        return source
+    if isinstance(source, str):
+        return create_library_engine(EngineConfig(url=source))
+    if isinstance(source, EngineConfig):
+        return create_library_engine(source)
+    raise TypeError(f"Expected Engine, URL or EngineConfig, got {type(source).__name__}")
+
 # Database setup
-engine = create_engine('sqlite:///library.db', echo=False)
+engine = create_engine(DEFAULT_URL, echo=False)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def init_db():
-    """Initialize database tables."""
-    Base.metadata.drop_all(engine) # restart everytime
-    Base.metadata.create_all(bind=engine)
+def make_session_factory(bind: Engine):
+    """Session factory bound to `bind`, configured like SessionLocal."""
+    return sessionmaker(autocommit=False, autoflush=False, bind=bind)
+
+def init_db(bind: Engine = None, reset: bool = True):
+    """
+    Initialize database tables.
+
+    reset=False keeps existing data: only missing tables and indexes are
+    created (e.g. on a database cloned from a fixtures template), and an older
+    books table is upgraded in place (see models/book.py).
+    """
+    bind = bind or engine
+    if reset:
+        Base.metadata.drop_all(bind) # restart everytime
+    Base.metadata.create_all(bind=bind)
+    if not reset:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind, checkfirst=True)
     print("Database initialized successfully!")
 
 def get_session():
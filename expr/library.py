@@ -2,7 +2,10 @@
 Simplified library class for experiment
 """
 
-from db_init import get_session, close_session
+from sqlalchemy import insert
+from itertools import islice
+import time
+from db_init import engine, get_session, close_session
 from models.book import Book
 
 class Library:
@@ -11,6 +14,31 @@ class Library:
     def __init__(self):
         self.name = "Smart Library System"
     
+    def bulk_add_books(self, rows, batch_size: int = 10000, rebuild_indexes: bool = False) -> dict:
+        """Insert many books with Core executemany, batched in one transaction."""
+        start = time.perf_counter()
+        total = 0
+        rows = iter(rows)
+        with engine.begin() as connection:
+            if rebuild_indexes:
+                for index in Book.__table__.indexes:
+                    index.drop(connection)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                connection.execute(insert(Book.__table__), batch)
+                total += len(batch)
+            if rebuild_indexes:
+                for index in Book.__table__.indexes:
+                    index.create(connection)
+        seconds = time.perf_counter() - start
+        return {
+            'rows': total,
+            'seconds': seconds,
+            'rows_per_sec': total / seconds if seconds > 0 else float('inf')
+        }
+
     def naive_search_books(self, keyword: str) -> list[dict]:
         """linear search using for loop"""
         session = get_session()
@@ -0,0 +1,116 @@
+"""
+Template database cache for Smart Library System.
+Builds a populated SQLite file once per dataset and clones it for each run.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateIndex, CreateTable
+from db_init import Base, init_db, resolve_engine
+from importer import import_books, import_users
+from library import Library
+from models.book import FTS_DDL
+from models.stats import STATS_DDL
+
+DEFAULT_CACHE_DIR = '.fixtures'
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def schema_fingerprint() -> str:
+    """Hash of the DDL of every table, index and trigger, so schema changes invalidate templates."""
+    dialect = sqlite.dialect()
+    ddl = []
+    for table in Base.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+        ddl.extend(str(CreateIndex(index).compile(dialect=dialect)) for index in sorted(table.indexes, key=lambda i: i.name))
+    ddl.extend(FTS_DDL)
+    ddl.extend(STATS_DDL)
+    return hashlib.sha256('\n'.join(ddl).encode()).hexdigest()
+
+def template_database(key: dict, populate, cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    """
+    Path of a populated template database identified by `key`.
+
+    On a cache miss, a fresh database is initialized, `populate(library)`
+    fills it, and the file is moved into `cache_dir` atomically. The
+    schema fingerprint is part of the key, so templates built with an
+    older schema are never reused.
+    """
+    key = {**key, 'schema': schema_fingerprint()}
+    name = hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+    path = os.path.join(cache_dir, f'template-{name}.db')
+    if os.path.exists(path):
+        return path
+    os.makedirs(cache_dir, exist_ok=True)
+    building = f'{path}.{os.getpid()}.tmp'
+    engine = resolve_engine('sqlite:///' + building)
+    try:
+        init_db(engine)
+        populate(Library(engine, instrument=False))
+    except BaseException:
+        engine.dispose()
+        if os.path.exists(building):
+            os.remove(building)
+        raise
+    engine.dispose()
+    os.replace(building, path)
+    with open(os.path.join(cache_dir, f'template-{name}.json'), 'w') as f:
+        json.dump(key, f, indent=2)
+    return path
+
+def clone_database(template: str, target: str, method: str = 'copy') -> str:
+    """
+    Replace the SQLite file `target` with a copy of `template`.
+
+    method='copy' copies the file; method='backup' uses SQLite's online
+    backup API (safe even while another process reads the template).
+    Close every connection to `target` first.
+    """
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(target + suffix):
+            os.remove(target + suffix)
+    if method == 'copy':
+        shutil.copyfile(template, target)
+    elif method == 'backup':
+        source = sqlite3.connect(template)
+        destination = sqlite3.connect(target)
+        try:
+            source.backup(destination)
+        finally:
+            destination.close()
+            source.close()
+    else:
+        raise ValueError(f"Unknown clone method: {method}")
+    return target
+
+def dataset_database(books_path: str = 'books.json', users_path: str = 'users.json',
+                     n_books: int = None, n_users: int = None, target: str = 'library.db',
+                     cache_dir: str = DEFAULT_CACHE_DIR, method: str = 'copy') -> str:
+    """
+    Clone a database holding the first `n_books` books and `n_users` users
+    (all if None) of the given JSON/JSONL files into `target`.
+
+    The template is keyed by the files' SHA-256 and the sizes, so it is
+    built on the first call and reused until a dataset file changes.
+    """
+    key = {
+        'books': file_digest(books_path), 'n_books': n_books,
+        'users': file_digest(users_path) if users_path else None, 'n_users': n_users
+    }
+
+    def populate(library):
+        import_books(library, books_path, 0, n_books, rebuild_indexes=True)
+        if users_path:
+            import_users(library, users_path, 0, n_users)
+
+    return clone_database(template_database(key, populate, cache_dir), target, method)
@@ -0,0 +1,56 @@
+"""
+Full-text search for Smart Library System.
+Queries the SQLite FTS5 table `books_fts` defined in models/book.py.
+"""
+
+from sqlalchemy import text
+from models.book import Book, FTS_DDL
+
+FTS_FIELDS = ('title', 'author', 'genre')
+FTS_TRIGGERS = ('books_fts_ai', 'books_fts_ad', 'books_fts_au')
+
+def check_fields(fields, allowed=FTS_FIELDS):
+    """Raise ValueError if `fields` contains anything not in `allowed` (default title/author/genre)."""
+    unknown = set(fields) - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown search fields: {sorted(unknown)}")
+
+def build_match_query(keyword: str, fields=None) -> str:
+    """
+    Turn a user keyword into an FTS5 MATCH expression.
+
+    Every whitespace separated term is quoted (so punctuation cannot be
+    parsed as FTS5 syntax) and matched as a token prefix. Terms are ANDed.
+    `fields` restricts matching to a subset of title/author/genre.
+    """
+    terms = keyword.split()
+    if not terms:
+        return ''
+    expression = ' '.join('"' + term.replace('"', '""') + '"*' for term in terms)
+    if fields:
+        check_fields(fields)
+        expression = '{' + ' '.join(fields) + '} : (' + expression + ')'
+    return expression
+
+def fts_search(session, keyword: str, fields=None, limit=None) -> list:
+    """Return Book entities matching `keyword`, best bm25 score first."""
+    match = build_match_query(keyword, fields)
+    if not match:
+        return []
+    sql = (
+        "SELECT books.* FROM books_fts "
+        "JOIN books ON books.id = books_fts.rowid "
+        "WHERE books_fts MATCH :match "
+        "ORDER BY bm25(books_fts)"
+    )
+    params = {'match': match}
+    if limit is not None:
+        sql += " LIMIT :limit"
+        params['limit'] = limit
+    return session.query(Book).from_statement(text(sql).bindparams(**params)).all()
+
+def rebuild_fts_index(connection):
+    """Create (if missing) and rebuild `books_fts` from the books table."""
+    for statement in FTS_DDL:
+        connection.execute(text(statement))
+    connection.execute(text("INSERT INTO books_fts(books_fts) VALUES ('rebuild')"))
@@ -0,0 +1,144 @@
+"""
+Typo-tolerant token index for Smart Library System.
+A BK-tree over the distinct title and author tokens finds the words within
+a few edits of a misspelled keyword without comparing against every book.
+"""
+
+import heapq
+import re
+from normalization import normalize
+
+FIELDS = ('title', 'author')
+
+TOKEN = re.compile(r'\w+')
+
+def tokenize(value: str) -> list[str]:
+    """Normalized (case-folded, accent-stripped) word tokens of `value`."""
+    return TOKEN.findall(normalize(value))
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance (insertions, deletions and substitutions)."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+class BKTree:
+    """
+    Burkhard-Keller tree of words under edit distance.
+
+    Each child hangs off its parent at its distance d from the parent word.
+    By the triangle inequality, words within k of a query q lie only under
+    children whose edge d satisfies |d - distance(q, parent)| <= k, so a
+    lookup with small k visits a small part of the vocabulary.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, word: str):
+        """Insert `word` (no-op if present)."""
+        if self.root is None:
+            self.root = (word, {})
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                self.size += 1
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int) -> list[tuple[int, str]]:
+        """(distance, word) for every word within `max_distance` of `word`, closest first."""
+        if self.root is None:
+            return []
+        matches = []
+        stack = [self.root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = edit_distance(word, node_word)
+            if distance <= max_distance:
+                matches.append((distance, node_word))
+            low, high = distance - max_distance, distance + max_distance
+            stack.extend(child for edge, child in children.items() if low <= edge <= high)
+        matches.sort()
+        return matches
+
+class FuzzyIndex:
+    """
+    Token postings per field plus a BK-tree over all tokens.
+
+    A keyword matches a book when each of its tokens is within the max
+    distance of some token of the book's title or author; the book's
+    distance is the sum over the keyword tokens of the closest one. Results
+    are ranked by distance, then rating (highest first), then id.
+    """
+
+    def __init__(self):
+        self.tree = BKTree()
+        self.postings = {field: {} for field in FIELDS}
+        self.ratings = {}
+
+    def __len__(self):
+        return len(self.ratings)
+
+    def add(self, book_id: int, title: str, author: str, rating: float):
+        """Index one book. Tokens stay in the tree after their books are gone."""
+        self.ratings[book_id] = rating
+        for field, value in zip(FIELDS, (title, author)):
+            postings = self.postings[field]
+            for token in tokenize(value):
+                posting = postings.get(token)
+                if posting is None:
+                    postings[token] = posting = set()
+                    self.tree.add(token)
+                posting.add(book_id)
+
+    def distances(self, keyword: str, max_distance: int, fields=None) -> dict:
+        """book id -> distance of every book matching `keyword`."""
+        tokens = tokenize(keyword)
+        if not tokens:
+            return {}
+        postings = [self.postings[field] for field in (fields or FIELDS)]
+        result = None
+        for token in dict.fromkeys(tokens):
+            closest = {}
+            # tree matches come closest first, so the first hit per book is its minimum
+            for distance, word in self.tree.search(token, max_distance):
+                for field_postings in postings:
+                    for book_id in field_postings.get(word, ()):
+                        if book_id not in closest:
+                            closest[book_id] = distance
+            if result is None:
+                result = closest
+            else:
+                result = {book_id: distance + closest[book_id] for book_id, distance in result.items() if book_id in closest}
+            if not result:
+                break
+        return result
+
+    def search(self, keyword: str, max_distance: int = 2, fields=None, limit: int = None) -> list[tuple[int, int]]:
+        """(book id, distance) of the matches of `keyword`, best first."""
+        distances = self.distances(keyword, max_distance, fields)
+        ratings = self.ratings
+        key = lambda book_id: (distances[book_id], -ratings[book_id], book_id)
+        if limit is None:
+            ranked = sorted(distances, key=key)
+        else:
+            ranked = heapq.nsmallest(limit, distances, key=key)
+        return [(book_id, distances[book_id]) for book_id in ranked]
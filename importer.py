@@ -0,0 +1,185 @@
+"""
+Streaming catalog import for Smart Library System.
+Reads JSON arrays or JSONL files record by record with constant memory.
+
+A sidecar offset index (`<file>.idx`) stores the byte offset of every
+`stride`-th record, so reading rows [start, stop) seeks close to `start`
+instead of parsing the whole prefix of the file.
+"""
+
+import io
+import json
+import os
+from itertools import islice
+
+CHUNK_SIZE = 1 << 16 # characters read per refill of the JSON array buffer
+DEFAULT_STRIDE = 1000 # records between two entries of the offset index
+WHITESPACE = ' \t\r\n'
+
+def index_path(path: str) -> str:
+    """Location of the sidecar offset index for `path`."""
+    return path + '.idx'
+
+def detect_format(path: str) -> str:
+    """Return 'array' for a JSON array file, 'jsonl' otherwise."""
+    with open(path, 'r', encoding='utf-8') as fh:
+        while True:
+            char = fh.read(1)
+            if not char:
+                return 'jsonl'
+            if char not in WHITESPACE:
+                return 'array' if char == '[' else 'jsonl'
+
+def _iter_jsonl(fh, offset: int):
+    """Yield (byte offset, record) for each non-blank line of a binary file."""
+    for line in fh:
+        if line.strip():
+            yield offset, json.loads(line)
+        offset += len(line)
+
+def _iter_array(fh, offset: int, inside: bool, stride):
+    """
+    Yield (byte offset, record) for the elements of a JSON array.
+
+    `fh` is a binary file positioned at `offset`; `inside` is True when that
+    position is already past the opening '[' (i.e. at an element boundary).
+    Computing a byte offset means re-encoding the buffered text, so it is only
+    done for every `stride`-th record (None elsewhere, and always None for 0).
+    """
+    # newline='' keeps '\r\n' as read, so re-encoded text matches the file's bytes
+    text = io.TextIOWrapper(fh, encoding='utf-8', newline='')
+    decoder = json.JSONDecoder()
+    buf, pos, eof = '', 0, False
+    base = offset # byte offset of buf[0]
+
+    def fill():
+        nonlocal buf, pos, base, eof
+        if pos:
+            base += len(buf[:pos].encode('utf-8'))
+            buf, pos = buf[pos:], 0
+        chunk = text.read(CHUNK_SIZE)
+        eof = not chunk
+        buf += chunk
+
+    def skip(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    count = 0
+    if not inside:
+        skip(WHITESPACE)
+        if buf[pos:pos + 1] != '[':
+            raise ValueError("Expected a JSON array")
+        pos += 1
+    while True:
+        skip(WHITESPACE + ',')
+        if pos >= len(buf):
+            raise ValueError("Unterminated JSON array")
+        if buf[pos] == ']':
+            return
+        try:
+            record, end = decoder.raw_decode(buf, pos)
+            complete = end < len(buf) or eof
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            fill()
+            continue
+        if stride and count % stride == 0:
+            yield base + len(buf[:pos].encode('utf-8')), record
+        else:
+            yield None, record
+        count += 1
+        pos = end
+        if pos > CHUNK_SIZE:
+            fill()
+
+def _iter_from(path: str, fmt: str, offset: int, stride=0):
+    """
+    Yield (byte offset, record) starting at a record boundary `offset` (0 = file start).
+
+    Offsets are only guaranteed for every `stride`-th record; the default 0
+    skips offset bookkeeping entirely.
+    """
+    with open(path, 'rb') as fh:
+        fh.seek(offset)
+        if fmt == 'jsonl':
+            yield from _iter_jsonl(fh, offset)
+        else:
+            yield from _iter_array(fh, offset, inside=offset > 0, stride=stride)
+
+def build_offset_index(path: str, stride: int = DEFAULT_STRIDE) -> dict:
+    """Scan `path` once and write its sidecar offset index."""
+    fmt = detect_format(path)
+    offsets = []
+    count = 0
+    for offset, _ in _iter_from(path, fmt, 0, stride):
+        if count % stride == 0:
+            offsets.append(offset)
+        count += 1
+    stat = os.stat(path)
+    index = {
+        'format': fmt,
+        'stride': stride,
+        'count': count,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'offsets': offsets
+    }
+    with open(index_path(path), 'w') as fh:
+        json.dump(index, fh)
+    return index
+
+def load_offset_index(path: str, build: bool = True):
+    """Return the offset index for `path`, rebuilding it if missing or stale."""
+    try:
+        with open(index_path(path), 'r') as fh:
+            index = json.load(fh)
+        stat = os.stat(path)
+        if index['size'] == stat.st_size and index['mtime_ns'] == stat.st_mtime_ns:
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+    return build_offset_index(path) if build else None
+
+def count_records(path: str) -> int:
+    """Number of records in `path` (from the offset index)."""
+    return load_offset_index(path)['count']
+
+def iter_records(path: str, start: int = 0, stop: int = None, use_index: bool = True):
+    """
+    Yield the records with positions [start, stop) of a JSON array or JSONL file.
+
+    With use_index=True a non-zero `start` seeks via the sidecar offset index
+    (built on first use), so only at most `stride` records are skipped.
+    """
+    fmt = detect_format(path)
+    offset, skip = 0, start
+    if start and use_index:
+        index = load_offset_index(path)
+        slot = min(start // index['stride'], len(index['offsets']) - 1)
+        if slot >= 0:
+            offset = index['offsets'][slot]
+            skip = start - slot * index['stride']
+    records = (record for _, record in _iter_from(path, fmt, offset))
+    limit = None if stop is None else max(stop - start, 0)
+    yield from islice(records, skip, None if limit is None else skip + limit)
+
+def import_books(library, path: str, start: int = 0, stop: int = None,
+                 batch_size: int = 10000, rebuild_indexes: bool = False) -> dict:
+    """Stream books [start, stop) from `path` into `library` via bulk_add_books."""
+    records = iter_records(path, start, stop)
+    return library.bulk_add_books(records, batch_size=batch_size, rebuild_indexes=rebuild_indexes)
+
+def import_users(library, path: str, start: int = 0, stop: int = None,
+                 batch_size: int = 10000) -> dict:
+    """Stream users [start, stop) from `path` into `library` via bulk_add_users."""
+    records = iter_records(path, start, stop)
+    return library.bulk_add_users(records, batch_size=batch_size)
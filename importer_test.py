@@ -0,0 +1,44 @@
+"""
+Importer test for Smart Library System.
+Checks that ranges read through the sidecar offset index match a full parse,
+for JSON array and JSONL files with LF and CRLF line endings.
+"""
+
+import json
+import os
+import tempfile
+from importer import build_offset_index, iter_records
+
+def write_catalog(path: str, records: list, fmt: str, newline: str):
+    """Write `records` as an indented JSON array (like data.py) or as JSONL."""
+    if fmt == 'array':
+        text = json.dumps(records, indent=2, ensure_ascii=False)
+    else:
+        text = '\n'.join(json.dumps(record, ensure_ascii=False) for record in records) + '\n'
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text.replace('\n', newline))
+
+def test_offset_index():
+    """Resume at several starts and compare with slices of the full read."""
+    print("Testing importer offsets...")
+    records = [{'title': f'Book {i} – café', 'author': f'Author {i % 7}', 'year': 1900 + i % 120}
+                for i in range(2500)]
+    with tempfile.TemporaryDirectory() as directory:
+        for fmt in ('array', 'jsonl'):
+            for name, newline in (('lf', '\n'), ('crlf', '\r\n')):
+                path = os.path.join(directory, f'{fmt}-{name}.json')
+                write_catalog(path, records, fmt, newline)
+                index = build_offset_index(path, stride=100)
+                assert index['count'] == len(records), (fmt, name, index['count'])
+                with open(path, 'rb') as f:
+                    data = f.read()
+                for slot, offset in enumerate(index['offsets']):
+                    # every indexed offset is the first byte of its record
+                    assert data[offset:offset + 1] == b'{', (fmt, name, slot, offset)
+                for start, stop in ((0, 3), (1500, 1503), (99, 201), (2450, None), (2499, 2600)):
+                    assert list(iter_records(path, start, stop)) == records[start:stop], (fmt, name, start, stop)
+                print(f"  ok       {fmt} {name}")
+    print("Importer test passed!")
+
+if __name__ == "__main__":
+    test_offset_index()
@@ -0,0 +1,221 @@
+"""
+Query instrumentation for Smart Library System.
+Attributes SQL statements, fetched rows and DB time to Library calls.
+"""
+
+import bisect
+import contextvars
+import functools
+import threading
+import time
+import weakref
+from sqlalchemy import event
+
+# Upper bounds (milliseconds) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Frame of the outermost instrumented Library call running in this context
+# (a ContextVar rather than a thread-local so concurrent AsyncLibrary calls,
+# which share a thread, are kept apart)
+_current_call = contextvars.ContextVar('library_call', default=None)
+
+# Engine -> number of Library instances instrumenting it
+_instrumented_engines = weakref.WeakKeyDictionary()
+_engines_lock = threading.Lock()
+
+class CallFrame:
+    """Counters of one Library call while it runs."""
+
+    __slots__ = ('statements', 'rows', 'db_time', 'statement_start')
+
+    def __init__(self):
+        self.statements = 0
+        self.rows = 0
+        self.db_time = 0.0
+        self.statement_start = 0.0
+
+class CountingCursor:
+    """DBAPI cursor proxy counting fetched rows and the time spent fetching them."""
+
+    def __init__(self, cursor, frame: CallFrame):
+        self._cursor = cursor
+        self._frame = frame
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._frame.db_time += time.perf_counter() - start
+        if row is not None:
+            self._frame.rows += 1
+        return row
+
+    def fetchmany(self, *args):
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(*args)
+        self._frame.db_time += time.perf_counter() - start
+        self._frame.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._frame.db_time += time.perf_counter() - start
+        self._frame.rows += len(rows)
+        return rows
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    frame = _current_call.get()
+    if frame is not None:
+        frame.statement_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    frame = _current_call.get()
+    if frame is not None:
+        frame.statements += 1
+        frame.db_time += time.perf_counter() - frame.statement_start
+        if context is not None and context.cursor is cursor:
+            # the result is built from context.cursor next, so its fetches go through the proxy
+            context.cursor = CountingCursor(cursor, frame)
+
+def instrument_engine(engine):
+    """
+    Install the cursor hooks on `engine`.
+
+    Calls are counted per engine; the hooks stay until each one is matched
+    by uninstrument_engine. Statements executed outside an instrumented
+    Library call are not counted and cost one ContextVar lookup per event.
+    """
+    with _engines_lock:
+        count = _instrumented_engines.get(engine, 0)
+        if not count:
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        _instrumented_engines[engine] = count + 1
+
+def uninstrument_engine(engine):
+    """Undo one instrument_engine call; the last one removes the hooks."""
+    with _engines_lock:
+        count = _instrumented_engines.get(engine, 0)
+        if count > 1:
+            _instrumented_engines[engine] = count - 1
+        elif count == 1:
+            del _instrumented_engines[engine]
+            event.remove(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.remove(engine, 'after_cursor_execute', _after_cursor_execute)
+
+class MethodStats:
+    """Aggregated counters and latency histogram of one Library method."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.statements = 0
+        self.max_statements = 0
+        self.rows = 0
+        self.total_time = 0.0
+        self.db_time = 0.0
+        self.max_time = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, frame: CallFrame, elapsed: float, failed: bool):
+        self.calls += 1
+        self.errors += failed
+        self.statements += frame.statements
+        self.max_statements = max(self.max_statements, frame.statements)
+        self.rows += frame.rows
+        self.total_time += elapsed
+        self.db_time += min(frame.db_time, elapsed)
+        self.max_time = max(self.max_time, elapsed)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed * 1000)] += 1
+
+    def quantile_ms(self, q: float) -> float:
+        """Upper bound of the histogram bucket holding quantile `q`."""
+        rank = q * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return round(self.max_time * 1000, 3)
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary (times in milliseconds)."""
+        calls = self.calls or 1
+        histogram = {f'le_{bound}ms': count for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets)}
+        histogram['inf'] = self.buckets[-1]
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'statements': self.statements,
+            'statements_per_call': round(self.statements / calls, 2),
+            'max_statements_per_call': self.max_statements,
+            'rows': self.rows,
+            'rows_per_call': round(self.rows / calls, 2),
+            'total_ms': round(self.total_time * 1000, 3),
+            'db_ms': round(self.db_time * 1000, 3),
+            'python_ms': round((self.total_time - self.db_time) * 1000, 3),
+            'mean_ms': round(self.total_time * 1000 / calls, 3),
+            'max_ms': round(self.max_time * 1000, 3),
+            'p50_ms': self.quantile_ms(0.50),
+            'p95_ms': self.quantile_ms(0.95),
+            'p99_ms': self.quantile_ms(0.99),
+            'histogram': histogram
+        }
+
+class LibraryMetrics:
+    """Per-method MethodStats of one Library instance."""
+
+    def __init__(self):
+        self._methods = {}
+        self._lock = threading.Lock()
+
+    def record(self, method: str, frame: CallFrame, elapsed: float, failed: bool):
+        with self._lock:
+            stats = self._methods.get(method)
+            if stats is None:
+                stats = self._methods[method] = MethodStats()
+            stats.record(frame, elapsed, failed)
+
+    def snapshot(self) -> dict:
+        """{method: counters} for every method called so far."""
+        with self._lock:
+            return {method: stats.to_dict() for method, stats in sorted(self._methods.items())}
+
+    def reset(self):
+        with self._lock:
+            self._methods.clear()
+
+def instrumented(method):
+    """
+    Record calls of a Library method in `self._metrics`.
+
+    Only the outermost Library call is recorded: statements issued by
+    methods it calls internally (e.g. recommend_books calling
+    get_user_preferred_genres) are attributed to it.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        metrics = self._metrics
+        if metrics is None or _current_call.get() is not None:
+            return method(self, *args, **kwargs)
+        frame = CallFrame()
+        token = _current_call.set(frame)
+        failed = True
+        start = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_call.reset(token)
+            metrics.record(name, frame, elapsed, failed)
+    return wrapper
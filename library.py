@@ -4,72 +4,445 @@ Simple interface for library operations.
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, desc, func
+from sqlalchemy import and_, or_, desc, distinct, func, insert, literal, null, select, text, union, union_all
 from datetime import datetime
 from collections import Counter
-from db_init import get_session, close_session
+from itertools import islice
+import time
+from db_init import close_session, make_session_factory, resolve_engine
+from fts_search import FTS_FIELDS, FTS_TRIGGERS, check_fields, fts_search, rebuild_fts_index
+from trigram_index import TrigramIndex
+from fuzzy_index import FIELDS as FUZZY_FIELDS, FuzzyIndex
+from autocomplete import FIELDS as AUTOCOMPLETE_FIELDS, AutocompleteIndex
+from normalization import normalize, prefix_upper_bound
+from recommendation_index import RecommendationIndex
+from collaborative import ItemItemRecommender
+from result_cache import ResultCache, cached_per_user
+from records import BookRecord, UserRecord, select_books, select_users, to_records
+from pagination import encode_cursor, decode_cursor
+from snapshot import export_snapshot
+from instrumentation import LibraryMetrics, instrument_engine, instrumented, uninstrument_engine
 from models.book import Book
 from models.user import User
 from models.borrowing import Borrowing
+from models.stats import LibraryStats, GenreStats, RECOMPUTE_SQL
+
+ID_CHUNK_SIZE = 500 # ids per IN (...) clause, well below SQLite's variable limit
+
+# Public methods not recorded by the instrumentation (the iterators run
+# their queries after the call has returned)
+UNINSTRUMENTED_METHODS = ('get_session', 'close', 'cache_stats', 'metrics', 'reset_metrics',
+                          'iter_books', 'iter_search', 'iter_users')
 
 class Library:
     """Simple library interface."""
     
-    def __init__(self):
+    def __init__(self, engine=None, cache_size: int = 0, cache_ttl: float = None, instrument: bool = True):
+        """
+        `engine` may be an Engine, a database URL or a db_init.EngineConfig
+        (pool settings and SQLite pragmas); by default the shared engine
+        from db_init is used.
+
+        cache_size > 0 caches up to that many per-user recommendation and
+        profile results (optionally expiring after cache_ttl seconds); they
+        are invalidated by the writes that can change them.
+
+        instrument=True records statements, rows and latency of every
+        public method call, see metrics(); close() removes the engine hooks.
+        """
         self.name = "Smart Library System"
+        self.engine = resolve_engine(engine)
+        self._session_factory = make_session_factory(self.engine)
+        self._trigram_index = None
+        self._fuzzy_index = None
+        self._autocomplete_index = None
+        self._recommendation_index = None
+        self.collaborative = None
+        self.cache = ResultCache(cache_size, cache_ttl) if cache_size > 0 else None
+        self._metrics = LibraryMetrics() if instrument else None
+        self._closed = False
+        if instrument:
+            instrument_engine(self.engine)
+    
+    def get_session(self):
+        """Get a session bound to this library's engine."""
+        return self._session_factory()
+    
+    def close(self):
+        """Stop instrumenting the engine (idempotent). The engine stays open, it may be shared."""
+        if self._metrics is not None and not self._closed:
+            uninstrument_engine(self.engine)
+        self._closed = True
     
     # Book operations
     def add_book(self, title: str, author: str, genre: str, year: int, rating: float) -> dict:
         """Add a new book."""
-        session = get_session()
+        session = self.get_session()
         try:
             book = Book(title=title, author=author, genre=genre, year=year, rating=rating)
             session.add(book)
             session.commit()
+            if self._trigram_index is not None:
+                self._trigram_index.add(book.id, book.title, book.author, book.genre)
+            if self._fuzzy_index is not None:
+                self._fuzzy_index.add(book.id, book.title, book.author, book.rating)
+            if self._autocomplete_index is not None:
+                self._autocomplete_index.add(book.id, book.title, book.author, book.rating)
+            if self._recommendation_index is not None:
+                self._recommendation_index.add(book.id, book.genre, book.rating)
+            if self.cache is not None:
+                self.cache.invalidate_namespace('recommend')
             return book.to_dict()
         finally:
             close_session(session)
     
-    def get_all_books(self) -> list[dict]:
-        """Get all books."""
-        session = get_session()
+    def bulk_add_books(self, rows, batch_size: int = 10000, rebuild_indexes: bool = False) -> dict:
+        """
+        Insert many books (an iterable of dicts) with Core executemany.
+
+        Rows are sent in batches of `batch_size` inside one transaction.
+        With rebuild_indexes=True, secondary indexes and the full-text sync
+        triggers are dropped for the load and rebuilt once at the end, which
+        is faster for large loads into a big table. Returns a load report.
+        """
+        report = self._bulk_insert(Book.__table__, rows, batch_size, rebuild_indexes)
+        # in-memory indexes are rebuilt lazily on next use
+        self._trigram_index = None
+        self._fuzzy_index = None
+        self._autocomplete_index = None
+        self._recommendation_index = None
+        if self.cache is not None:
+            self.cache.invalidate_namespace('recommend')
+        return report
+    
+    def get_all_books(self, lean: bool = False, records: bool = False) -> list[dict]:
+        """
+        Get all books.
+
+        lean=True selects the columns through Core and builds the dicts
+        straight from row tuples (no ORM entities or identity map);
+        records=True returns BookRecord named tuples the same way.
+        """
+        if lean or records:
+            return self._read_records(select_books(), BookRecord, records)
+        session = self.get_session()
         try:
             books = session.query(Book).all()
             return [book.to_dict() for book in books]
         finally:
             close_session(session)
     
-    def naive_search_books(self, keyword: str) -> list[dict]:
-        """linear search using for loop"""
-        session = get_session()
+    def naive_search_books(self, keyword: str, lean: bool = False, records: bool = False) -> list[dict]:
+        """
+        linear search using for loop (lean/records as in get_all_books);
+        case- and accent-insensitive, see normalization.normalize
+        """
+        keyword = normalize(keyword)
+        if lean or records:
+            with self.engine.connect() as connection:
+                rows = connection.execute(select_books())
+                matches = [row for row in rows if any(keyword in normalize(row[i]) for i in (1, 2, 3))]
+            return to_records(matches, BookRecord, records)
+        session = self.get_session()
         try:
             results = []
             books = session.query(Book).all()
             for book in books:
-                if (keyword in book.title) or (keyword in book.author) or (keyword in book.genre):
+                if (keyword in normalize(book.title)) or (keyword in normalize(book.author)) or (keyword in normalize(book.genre)):
                     results.append(book.to_dict())
             return results
         finally:
             close_session(session)
 
-    def search_books(self, keyword: str) -> list[dict]:
-        """Search books by keyword."""
-        session = get_session()
+    def search_books(self, keyword: str, mode: str = 'like', fields=None, limit: int = None,
+                     lean: bool = False, records: bool = False, max_distance: int = 2) -> list[dict]:
+        """
+        Search books by keyword.
+
+        mode='like' does substring matching with SQL LIKE (full table scan);
+        mode='prefix' and mode='exact' match the start or the whole of a
+        field through index range scans. These three compare the normalized
+        columns (case- and accent-insensitive), so 'like' finds exactly what
+        naive_search_books finds; results are in id order.
+        mode='fts' uses the FTS5 index, see fts_search_books;
+        mode='trigram' uses the in-memory trigram index, see trigram_search_books;
+        mode='fuzzy' tolerates typos up to max_distance edits, see fuzzy_search_books.
+        lean/records (modes 'like', 'prefix' and 'exact') skip the ORM as in get_all_books.
+        """
+        if mode == 'fts':
+            return self.fts_search_books(keyword, fields=fields, limit=limit)
+        if mode == 'trigram':
+            return self.trigram_search_books(keyword, fields=fields, limit=limit)
+        if mode == 'fuzzy':
+            return self.fuzzy_search_books(keyword, max_distance=max_distance, fields=fields, limit=limit)
+        clauses = {'like': _like_clause, 'prefix': _prefix_clause, 'exact': _exact_clause}
+        if mode not in clauses:
+            raise ValueError(f"Unknown search mode: {mode}")
+        fields = fields or FTS_FIELDS
+        check_fields(fields)
+        clause = clauses[mode](keyword, fields)
+        if lean or records:
+            statement = select_books().where(clause).order_by(Book.__table__.c.id).limit(limit)
+            return self._read_records(statement, BookRecord, records)
+        session = self.get_session()
         try:
-            books = session.query(Book).filter(
-                or_(
-                    Book.title.contains(keyword),
-                    Book.author.contains(keyword),
-                    Book.genre.contains(keyword)
-                )
-            ).all()
+            query = session.query(Book).filter(clause).order_by(Book.id)
+            if limit is not None:
+                query = query.limit(limit)
+            books = query.all()
+            return [book.to_dict() for book in books]
+        finally:
+            close_session(session)
+
+    def iter_books(self, batch_size: int = 1000, records: bool = False):
+        """
+        Yield every book as a dict (or BookRecord), in id order.
+
+        Rows are fetched `batch_size` at a time (yield_per), so memory stays
+        bounded whatever the catalog size. The connection is held until the
+        iterator is exhausted or closed.
+        """
+        statement = select_books().order_by(Book.__table__.c.id)
+        yield from self._iter_records(statement, BookRecord, batch_size, records)
+
+    def iter_search(self, keyword: str, fields=None, batch_size: int = 1000, records: bool = False):
+        """Yield the matches of search_books(keyword, mode='like') in id order, see iter_books."""
+        fields = fields or FTS_FIELDS
+        check_fields(fields)
+        statement = select_books().where(_like_clause(keyword, fields)).order_by(Book.__table__.c.id)
+        yield from self._iter_records(statement, BookRecord, batch_size, records)
+
+    def get_books_page(self, cursor: str = None, page_size: int = 100, keyword: str = None, fields=None) -> dict:
+        """
+        One page of books in id order, with keyset pagination.
+
+        Returns {'items': [book dicts], 'next_cursor': str or None}; pass
+        next_cursor back to get the following page (None on the last one).
+        Each page is an `id > last_id` range scan of the primary key, so
+        its cost does not grow with the page number. With `keyword`, only
+        books matching search_books(keyword, fields=fields) are listed.
+        """
+        statement = select_books()
+        kind = 'books'
+        if keyword is not None:
+            fields = fields or FTS_FIELDS
+            check_fields(fields)
+            statement = statement.where(_like_clause(keyword, fields))
+            kind = 'books-search'
+        return self._keyset_page(statement, Book.__table__.c.id, kind, cursor, page_size, BookRecord)
+
+    def faceted_search(self, keyword: str = None, genres=None, year_min: int = None, year_max: int = None,
+                       min_rating: float = None, fields=None, cursor: str = None, page_size: int = 20) -> dict:
+        """
+        Filtered search with genre and decade facet counts.
+
+        Filters (all optional, combined with AND): `keyword` as in
+        search_books(keyword, fields=fields), `genres` (exact genre names),
+        year_min/year_max (inclusive) and min_rating. Returns
+        {'items': one keyset page of matches in id order, 'next_cursor',
+        'total', 'facets': {'genre': {genre: count}, 'decade': {1990: count}}};
+        facets count every match, not just the page.
+
+        The filtered books are a CTE read by both a GROUP BY genre, decade
+        cross-tab (both facets are its margins) and the page query; the two
+        are glued with UNION ALL, so everything comes from one statement.
+        Genre, year and rating filters go through ix_books_genre_rating,
+        ix_books_year or ix_books_rating.
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be positive")
+        table = Book.__table__
+        conditions = []
+        if keyword is not None:
+            fields = fields or FTS_FIELDS
+            check_fields(fields)
+            conditions.append(_like_clause(keyword, fields))
+        if genres is not None:
+            conditions.append(table.c.genre.in_(list(genres)))
+        if year_min is not None:
+            conditions.append(table.c.year >= year_min)
+        if year_max is not None:
+            conditions.append(table.c.year <= year_max)
+        if min_rating is not None:
+            conditions.append(table.c.rating >= min_rating)
+        matches = select_books().where(*conditions).cte('matches')
+
+        decade = (matches.c.year // 10 * 10).label('year')
+        cross_tab = select(
+            literal('facet').label('kind'), null().label('id'), null().label('title'), null().label('author'),
+            matches.c.genre, decade, null().label('rating'), null().label('created_at'), func.count().label('count')
+        ).group_by(matches.c.genre, decade)
+        page = select(matches).order_by(matches.c.id).limit(page_size + 1)
+        if cursor is not None:
+            page = page.where(matches.c.id > decode_cursor(cursor, 'books-facets'))
+        page = page.subquery('page')
+        rows = select(literal('book').label('kind'), *page.c, null().label('count'))
+
+        with self.engine.connect() as connection:
+            # page rows first, so the UNION takes their column types
+            result = connection.execute(union_all(rows, cross_tab)).all()
+        genre_counts, decade_counts = Counter(), Counter()
+        books = []
+        for row in result:
+            if row.kind == 'facet':
+                genre_counts[row.genre] += row.count
+                decade_counts[row.year] += row.count
+            else:
+                books.append(row[1:-1])
+        books.sort(key=lambda book: book[0])
+        next_cursor = None
+        if len(books) > page_size:
+            books = books[:page_size]
+            next_cursor = encode_cursor('books-facets', books[-1][0])
+        return {
+            'items': to_records(books, BookRecord),
+            'next_cursor': next_cursor,
+            'total': sum(genre_counts.values()),
+            'facets': {
+                'genre': dict(sorted(genre_counts.items())),
+                'decade': dict(sorted(decade_counts.items()))
+            }
+        }
+
+    def fts_search_books(self, keyword: str, fields=None, limit: int = None) -> list[dict]:
+        """
+        Full-text search ranked by bm25.
+
+        Matches whole tokens or token prefixes (not arbitrary substrings),
+        optionally restricted to some of title/author/genre.
+        """
+        session = self.get_session()
+        try:
+            books = fts_search(session, keyword, fields=fields, limit=limit)
+            return [book.to_dict() for book in books]
+        finally:
+            close_session(session)
+
+    def trigram_search_books(self, keyword: str, fields=None, limit: int = None) -> list[dict]:
+        """
+        Substring search through the in-memory trigram index.
+
+        Same matches as naive_search_books, but only candidate books sharing
+        every trigram of the keyword are checked. The index is built from the
+        database on first use and updated by add_book.
+        """
+        if fields:
+            check_fields(fields)
+        book_ids = self._get_trigram_index().search(keyword, fields=fields)
+        if limit is not None:
+            book_ids = book_ids[:limit]
+        session = self.get_session()
+        try:
+            books = []
+            for start in range(0, len(book_ids), ID_CHUNK_SIZE):
+                chunk = book_ids[start:start + ID_CHUNK_SIZE]
+                books.extend(session.query(Book).filter(Book.id.in_(chunk)).order_by(Book.id).all())
             return [book.to_dict() for book in books]
         finally:
             close_session(session)
+
+    def _get_trigram_index(self) -> TrigramIndex:
+        """Return the trigram index, building it from the database if needed."""
+        if self._trigram_index is None:
+            self.rebuild_trigram_index()
+        return self._trigram_index
+
+    def rebuild_trigram_index(self):
+        """(Re)build the trigram index from every book in the database."""
+        index = TrigramIndex()
+        session = self.get_session()
+        try:
+            rows = session.query(Book.id, Book.title, Book.author, Book.genre).yield_per(ID_CHUNK_SIZE * 20)
+            for book_id, title, author, genre in rows:
+                index.add(book_id, title, author, genre)
+        finally:
+            close_session(session)
+        self._trigram_index = index
+
+    def fuzzy_search_books(self, keyword: str, max_distance: int = 2, fields=None, limit: int = None) -> list[dict]:
+        """Typo-tolerant search: every word of `keyword` within `max_distance` edits, best match first."""
+        if fields:
+            check_fields(fields, FUZZY_FIELDS)
+        ranked = self._get_fuzzy_index().search(keyword, max_distance=max_distance, fields=fields, limit=limit)
+        book_ids = [book_id for book_id, distance in ranked]
+        session = self.get_session()
+        try:
+            books = {}
+            for start in range(0, len(book_ids), ID_CHUNK_SIZE):
+                chunk = book_ids[start:start + ID_CHUNK_SIZE]
+                books.update((book.id, book) for book in session.query(Book).filter(Book.id.in_(chunk)))
+            return [books[book_id].to_dict() for book_id in book_ids if book_id in books]
+        finally:
+            close_session(session)
+
+    def _get_fuzzy_index(self) -> FuzzyIndex:
+        """Return the fuzzy index, building it from the database if needed."""
+        if self._fuzzy_index is None:
+            self.rebuild_fuzzy_index()
+        return self._fuzzy_index
+
+    def rebuild_fuzzy_index(self):
+        """(Re)build the fuzzy index from every book in the database."""
+        index = FuzzyIndex()
+        session = self.get_session()
+        try:
+            rows = session.query(Book.id, Book.title, Book.author, Book.rating).yield_per(ID_CHUNK_SIZE * 20)
+            for book_id, title, author, rating in rows:
+                index.add(book_id, title, author, rating)
+        finally:
+            close_session(session)
+        self._fuzzy_index = index
+
+    def autocomplete(self, prefix: str, limit: int = 10, fields=None) -> list[dict]:
+        """Best-rated books whose title or author starts with `prefix` (ignoring case and accents)."""
+        if fields:
+            check_fields(fields, AUTOCOMPLETE_FIELDS)
+        book_ids = self._get_autocomplete_index().suggest(prefix, limit=limit, fields=fields)
+        if not book_ids:
+            return []
+        session = self.get_session()
+        try:
+            books = {book.id: book for book in session.query(Book).filter(Book.id.in_(book_ids))}
+            return [books[book_id].to_dict() for book_id in book_ids if book_id in books]
+        finally:
+            close_session(session)
+
+    def _get_autocomplete_index(self) -> AutocompleteIndex:
+        """Return the autocomplete index, building it from the database if needed."""
+        if self._autocomplete_index is None:
+            self.rebuild_autocomplete_index()
+        return self._autocomplete_index
+
+    def rebuild_autocomplete_index(self):
+        """(Re)build the autocomplete index from every book in the database."""
+        index = AutocompleteIndex()
+        session = self.get_session()
+        try:
+            # best-rated first, so most inserts only append to the top-k lists
+            rows = session.query(Book.id, Book.title, Book.author, Book.rating).order_by(
+                desc(Book.rating), Book.id
+            ).yield_per(ID_CHUNK_SIZE * 20)
+            for book_id, title, author, rating in rows:
+                index.add(book_id, title, author, rating)
+        finally:
+            close_session(session)
+        self._autocomplete_index = index
+
+    def rebuild_search_index(self):
+        """Rebuild the full-text index from the books table."""
+        with self.engine.begin() as connection:
+            rebuild_fts_index(connection)
+    
+    def export_snapshot(self, directory: str, batch_size: int = 100000) -> dict:
+        """Write the books table to a columnar snapshot, see snapshot.load_snapshot."""
+        return export_snapshot(self.engine, directory, batch_size=batch_size)
     
-    def get_top_rated_books(self, limit: int = 10) -> list[dict]:
-        """Get top-rated books."""
-        session = get_session()
+    def get_top_rated_books(self, limit: int = 10, lean: bool = False, records: bool = False) -> list[dict]:
+        """Get top-rated books (lean/records as in get_all_books)."""
+        if lean or records:
+            statement = select_books().order_by(desc(Book.__table__.c.rating)).limit(limit)
+            return self._read_records(statement, BookRecord, records)
+        session = self.get_session()
         try:
             books = session.query(Book).order_by(desc(Book.rating)).limit(limit).all()
             return [book.to_dict() for book in books]
@@ -79,32 +452,113 @@ class Library:
     # User operations
     def add_user(self, name: str) -> dict:
         """Add a new user."""
-        session = get_session()
+        session = self.get_session()
         try:
             user = User(name=name)
             session.add(user)
             session.commit()
+            if self.cache is not None:
+                self.cache.invalidate_user(user.id) # a cached {} profile for this id
             return user.to_dict()
         finally:
             close_session(session)
     
-    def get_all_users(self) -> list[dict]:
-        """Get all users."""
-        session = get_session()
+    def bulk_add_users(self, rows, batch_size: int = 10000, rebuild_indexes: bool = False) -> dict:
+        """Insert many users (an iterable of dicts), see bulk_add_books."""
+        report = self._bulk_insert(User.__table__, rows, batch_size, rebuild_indexes)
+        if self.cache is not None:
+            self.cache.invalidate_namespace('profile')
+        return report
+    
+    def get_all_users(self, lean: bool = False, records: bool = False) -> list[dict]:
+        """Get all users (lean/records as in get_all_books, with UserRecord)."""
+        if lean or records:
+            return self._read_records(select_users(), UserRecord, records)
+        session = self.get_session()
         try:
             users = session.query(User).all()
             return [user.to_dict() for user in users]
         finally:
             close_session(session)
     
+    def iter_users(self, batch_size: int = 1000, records: bool = False):
+        """Yield every user as a dict (or UserRecord), see iter_books."""
+        statement = select_users().order_by(User.__table__.c.id)
+        yield from self._iter_records(statement, UserRecord, batch_size, records)
+    
+    def get_users_page(self, cursor: str = None, page_size: int = 100) -> dict:
+        """One page of users in id order, see get_books_page."""
+        return self._keyset_page(select_users(), User.__table__.c.id, 'users', cursor, page_size, UserRecord)
+    
+    def _iter_records(self, statement, record_type, batch_size: int, records: bool):
+        """Stream a column-only select in `batch_size` partitions."""
+        with self.engine.connect() as connection:
+            result = connection.execution_options(yield_per=batch_size).execute(statement)
+            for rows in result.partitions():
+                yield from to_records(rows, record_type, records)
+    
+    def _keyset_page(self, statement, id_column, kind: str, cursor, page_size: int, record_type) -> dict:
+        """Rows after the cursor's id (by `id_column`), page_size of them, plus the next cursor."""
+        if page_size < 1:
+            raise ValueError("page_size must be positive")
+        if cursor is not None:
+            statement = statement.where(id_column > decode_cursor(cursor, kind))
+        # one extra row tells whether another page follows
+        items = self._read_records(statement.order_by(id_column).limit(page_size + 1), record_type, False)
+        next_cursor = None
+        if len(items) > page_size:
+            items = items[:page_size]
+            next_cursor = encode_cursor(kind, items[-1]['id'])
+        return {'items': items, 'next_cursor': next_cursor}
+    
+    def _read_records(self, statement, record_type, records: bool) -> list:
+        """Run a column-only select; return dicts or `record_type` tuples."""
+        with self.engine.connect() as connection:
+            return to_records(connection.execute(statement), record_type, records)
+    
+    def _bulk_insert(self, table, rows, batch_size, rebuild_indexes) -> dict:
+        """Insert `rows` into `table` in batches within a single transaction."""
+        start = time.perf_counter()
+        total = 0
+        rows = iter(rows)
+        with self.engine.begin() as connection:
+            if rebuild_indexes:
+                for index in table.indexes:
+                    index.drop(connection)
+                if table is Book.__table__:
+                    for trigger in FTS_TRIGGERS:
+                        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                connection.execute(insert(table), batch)
+                total += len(batch)
+            if rebuild_indexes:
+                for index in table.indexes:
+                    index.create(connection)
+                if table is Book.__table__:
+                    rebuild_fts_index(connection)
+        seconds = time.perf_counter() - start
+        return {
+            'rows': total,
+            'seconds': seconds,
+            'rows_per_sec': total / seconds if seconds > 0 else float('inf')
+        }
+    
     # Borrowing operations
     def borrow_book(self, user_id: int, book_id: int) -> bool:
         """Borrow a book."""
-        session = get_session()
+        session = self.get_session()
         try:
             borrowing = Borrowing(user_id=user_id, book_id=book_id)
             session.add(borrowing)
             session.commit()
+            if self.collaborative is not None:
+                self.collaborative.record_borrow(user_id, book_id)
+            if self.cache is not None:
+                # other readers' cached item-item scores may lag until their next write or the TTL
+                self.cache.invalidate_user(user_id)
             return True
         except Exception:
             session.rollback()
@@ -114,7 +568,7 @@ class Library:
     
     def return_book(self, user_id: int, book_id: int) -> bool:
         """Return a book."""
-        session = get_session()
+        session = self.get_session()
         try:
             borrowing = session.query(Borrowing).filter(
                 Borrowing.user_id == user_id,
@@ -125,6 +579,8 @@ class Library:
             if borrowing:
                 borrowing.returned_at = datetime.utcnow()
                 session.commit()
+                if self.cache is not None:
+                    self.cache.invalidate_user(user_id)
                 return True
             return False
         except Exception:
@@ -133,9 +589,24 @@ class Library:
         finally:
             close_session(session)
     
+    def bulk_add_borrowings(self, rows, batch_size: int = 10000) -> dict:
+        """
+        Insert many borrowings (dicts with user_id, book_id and optionally
+        borrowed_at/returned_at), see bulk_add_books.
+
+        Cached recommendations and profiles are dropped and the
+        collaborative model is rebuilt on next use.
+        """
+        report = self._bulk_insert(Borrowing.__table__, rows, batch_size, False)
+        self.collaborative = None
+        if self.cache is not None:
+            self.cache.invalidate_namespace('recommend')
+            self.cache.invalidate_namespace('profile')
+        return report
+    
     def get_user_borrowed_books(self, user_id: int) -> list[dict]:
         """Get user's currently borrowed books."""
-        session = get_session()
+        session = self.get_session()
         try:
             borrowings = session.query(Borrowing).join(Book).filter(
                 Borrowing.user_id == user_id,
@@ -152,27 +623,79 @@ class Library:
             close_session(session)
     
     def get_statistics(self) -> dict:
-        """Get library statistics."""
-        session = get_session()
+        """
+        Get library statistics.
+
+        Reads the trigger-maintained counters in library_stats, so the cost
+        does not depend on the number of books, users or borrowings.
+        """
+        session = self.get_session()
         try:
-            total_books = session.query(Book).count()
-            total_users = session.query(User).count()
-            
-            # Get average rating
-            avg_rating = session.query(Book.rating).all()
-            avg_rating = sum(r[0] for r in avg_rating) / len(avg_rating) if avg_rating else 0
+            stats = session.get(LibraryStats, 1)
+            if stats is None:
+                close_session(session)
+                self.reconcile_statistics(fix=True)
+                session = self.get_session()
+                stats = session.get(LibraryStats, 1)
+            avg_rating = stats.rating_sum / stats.rating_count if stats.rating_count else 0
             
             return {
-                'total_books': total_books,
-                'total_users': total_users,
-                'average_rating': round(avg_rating, 2)
+                'total_books': stats.total_books,
+                'total_users': stats.total_users,
+                'average_rating': round(avg_rating, 2),
+                'total_borrowings': stats.total_borrowings,
+                'active_loans': stats.active_loans
             }
         finally:
             close_session(session)
     
+    def get_genre_counts(self) -> dict:
+        """Number of books per genre, from the trigger-maintained genre_stats."""
+        session = self.get_session()
+        try:
+            return dict(session.query(GenreStats.genre, GenreStats.book_count).order_by(GenreStats.genre).all())
+        finally:
+            close_session(session)
+    
+    def reconcile_statistics(self, fix: bool = False) -> dict:
+        """
+        Recompute every counter from scratch and compare with the stored ones.
+
+        Returns {counter: (stored, actual)} for each counter that drifted
+        (genre counts as 'genre:<name>'); with fix=True the stored counters
+        are overwritten with the recomputed values.
+        """
+        with self.engine.begin() as connection:
+            actual = dict(connection.execute(text(RECOMPUTE_SQL['library_stats'])).mappings().one())
+            row = connection.execute(text("SELECT * FROM library_stats WHERE id = 1")).mappings().first()
+            stored = dict(row) if row is not None else {}
+            drift = {}
+            for name, value in actual.items():
+                if name == 'rating_sum':
+                    if abs(stored.get(name, 0.0) - value) > 1e-6 * max(1.0, abs(value)) or row is None:
+                        drift[name] = (stored.get(name), value)
+                elif stored.get(name) != value:
+                    drift[name] = (stored.get(name), value)
+            
+            actual_genres = dict(connection.execute(text(RECOMPUTE_SQL['genre_stats'])).all())
+            stored_genres = dict(connection.execute(text("SELECT genre, book_count FROM genre_stats")).all())
+            for genre in set(actual_genres) | set(stored_genres):
+                if actual_genres.get(genre, 0) != stored_genres.get(genre, 0):
+                    drift[f'genre:{genre}'] = (stored_genres.get(genre, 0), actual_genres.get(genre, 0))
+            
+            if fix and drift:
+                connection.execute(text(
+                    "INSERT OR REPLACE INTO library_stats (id, total_books, total_users, total_borrowings, "
+                    "active_loans, rating_sum, rating_count) VALUES (1, :total_books, :total_users, "
+                    ":total_borrowings, :active_loans, :rating_sum, :rating_count)"
+                ), actual)
+                connection.execute(text("DELETE FROM genre_stats"))
+                connection.execute(text("INSERT INTO genre_stats (genre, book_count) " + RECOMPUTE_SQL['genre_stats']))
+            return drift
+    
     def get_user_preferred_genres(self, user_id: int) -> dict:
         """Get user's preferred genres based on borrowing history."""
-        session = get_session()
+        session = self.get_session()
         try:
             borrowed_books = session.query(Book).join(Borrowing).filter(
                 Borrowing.user_id == user_id
@@ -191,16 +714,31 @@ class Library:
         finally:
             close_session(session)
     
-    def recommend_books(self, user_id: int, limit: int = 5) -> list[dict]:
-        """Recommend books based on user's borrowing history."""
-        session = get_session()
+    @cached_per_user('recommend')
+    def recommend_books(self, user_id: int, limit: int = 5, mode: str = 'sql') -> list[dict]:
+        """
+        Recommend books based on user's borrowing history.
+
+        mode='sql' queries each preferred genre with NOT IN (borrowed ids);
+        mode='index' serves the same ranking from the in-memory
+        RecommendationIndex (see indexed_recommend_books);
+        mode='collaborative' uses the item-item model (see
+        collaborative_recommend_books).
+        """
+        if mode == 'index':
+            return self.indexed_recommend_books(user_id, limit=limit)
+        if mode == 'collaborative':
+            return self.collaborative_recommend_books(user_id, limit=limit)
+        if mode != 'sql':
+            raise ValueError(f"Unknown recommendation mode: {mode}")
+        session = self.get_session()
         try:
             # Get user's preferred genres
             genre_preferences = self.get_user_preferred_genres(user_id)
             
             if not genre_preferences:
                 # If user has no borrowing history, recommend top-rated books
-                books = session.query(Book).order_by(desc(Book.rating)).limit(limit).all()
+                books = session.query(Book).order_by(desc(Book.rating), Book.id).limit(limit).all()
                 result = []
                 for book in books:
                     book_dict = book.to_dict()
@@ -215,14 +753,13 @@ class Library:
             borrowed_book_ids = [bid[0] for bid in borrowed_book_ids]
             
             recommended_books = []
-            sorted_genres = sorted(genre_preferences.items(), key=lambda x: x[1], reverse=True)
             
-            for genre, preference in sorted_genres:
+            for genre in _ranked_genres(genre_preferences):
                 # Get books from this genre that user hasn't borrowed
                 genre_books = session.query(Book).filter(
                     Book.genre == genre,
                     ~Book.id.in_(borrowed_book_ids)
-                ).order_by(desc(Book.rating)).limit(limit).all()
+                ).order_by(desc(Book.rating), Book.id).limit(limit).all()
                 
                 recommended_books.extend(genre_books)
                 
@@ -234,7 +771,7 @@ class Library:
                 remaining_limit = limit - len(recommended_books)
                 additional_books = session.query(Book).filter(
                     ~Book.id.in_(borrowed_book_ids + [book.id for book in recommended_books])
-                ).order_by(desc(Book.rating)).limit(remaining_limit).all()
+                ).order_by(desc(Book.rating), Book.id).limit(remaining_limit).all()
                 
                 recommended_books.extend(additional_books)
             
@@ -253,42 +790,344 @@ class Library:
         finally:
             close_session(session)
     
-    def get_user_reading_profile(self, user_id: int) -> dict:
-        """Get comprehensive reading profile for a user."""
-        session = get_session()
+    def indexed_recommend_books(self, user_id: int, limit: int = 5) -> list[dict]:
+        """
+        recommend_books served from rating-sorted per-genre lists.
+
+        Three small queries fetch the reader's genre shares, their borrowed
+        ids and the chosen books; borrowed ids are skipped in memory. The
+        index is built from the database on first use and updated by
+        add_book; ids of books deleted since then are skipped.
+        """
+        index = self._get_recommendation_index()
+        session = self.get_session()
         try:
-            # user info
-            user = session.query(User).filter(User.id == user_id).first()
-            if not user:
-                return {}
-            
-            # borrowing statistics
-            total_borrowed = session.query(Borrowing).filter(Borrowing.user_id == user_id).count()
-            currently_borrowed = session.query(Borrowing).filter(
-                Borrowing.user_id == user_id,
-                Borrowing.returned_at.is_(None)
-            ).count()
-            
-            # genre preferences
-            genre_preferences = self.get_user_preferred_genres(user_id)
-            
-            # favorite authors
-            borrowed_books = session.query(Book).join(Borrowing).filter(
-                Borrowing.user_id == user_id
-            ).all()
-            
-            author_counts = Counter(book.author for book in borrowed_books)
-            favorite_authors = dict(author_counts.most_common(3))
+            genre_preferences = self._genre_preferences(session, [user_id])[user_id]
+            if not genre_preferences:
+                book_ids = index.top_rated(limit)
+            else:
+                borrowed = {book_id for (book_id,) in session.query(Borrowing.book_id).filter(
+                    Borrowing.user_id == user_id
+                )}
+                book_ids = index.recommend(_ranked_genres(genre_preferences), borrowed, limit)
             
-            return {
-                'user': user.to_dict(),
-                'total_books_borrowed': total_borrowed,
-                'currently_borrowed': currently_borrowed,
-                'genre_preferences': genre_preferences,
-                'favorite_authors': favorite_authors,
-                'most_recent_borrowings': [
-                    book.to_dict() for book in borrowed_books[-3:]  # Last 3 books
-                ]
-            }
+            books = {book.id: book for book in session.query(Book).filter(Book.id.in_(book_ids))}
+            result = []
+            for book_id in book_ids:
+                if book_id not in books:
+                    continue
+                book = books[book_id]
+                book_dict = book.to_dict()
+                if not genre_preferences:
+                    book_dict['recommendation_reason'] = "Top-rated book (no borrowing history)"
+                elif genre_preferences.get(book.genre, 0) > 0:
+                    book_dict['recommendation_reason'] = f"You've borrowed {genre_preferences[book.genre]}% {book.genre} books"
+                else:
+                    book_dict['recommendation_reason'] = "Top-rated book"
+                result.append(book_dict)
+            return result
+        finally:
+            close_session(session)
+    
+    def _get_recommendation_index(self) -> RecommendationIndex:
+        """Return the recommendation index, building it from the database if needed."""
+        if self._recommendation_index is None:
+            self.rebuild_recommendation_index()
+        return self._recommendation_index
+    
+    def rebuild_recommendation_index(self):
+        """(Re)build the recommendation index from every book in the database."""
+        session = self.get_session()
+        try:
+            rows = session.query(Book.id, Book.genre, Book.rating).yield_per(ID_CHUNK_SIZE * 20)
+            self._recommendation_index = RecommendationIndex.from_rows(rows)
+        finally:
+            close_session(session)
+    
+    def build_collaborative_model(self, neighbors: int = 50) -> ItemItemRecommender:
+        """Fit the item-item model on all borrowings; later borrow_book calls update it."""
+        session = self.get_session()
+        try:
+            self.collaborative = ItemItemRecommender(neighbors=neighbors).fit_from_session(session)
+            return self.collaborative
+        finally:
+            close_session(session)
+    
+    def collaborative_recommend_books(self, user_id: int, limit: int = 5) -> list[dict]:
+        """
+        Recommend books borrowed by readers of the same books (item-item CF).
+
+        Builds the model on first use. Users the model knows nothing about
+        get the genre-based recommend_books instead.
+        """
+        if self.collaborative is None:
+            self.build_collaborative_model()
+        scored = self.collaborative.recommend(user_id, limit)
+        if not scored:
+            return self.recommend_books(user_id, limit=limit)
+        session = self.get_session()
+        try:
+            books = {book.id: book for book in session.query(Book).filter(Book.id.in_([book_id for book_id, _ in scored]))}
+            result = []
+            for book_id, score in scored:
+                if book_id in books:
+                    book_dict = books[book_id].to_dict()
+                    book_dict['recommendation_reason'] = "Borrowed by readers of books you borrowed"
+                    book_dict['score'] = round(score, 4)
+                    result.append(book_dict)
+            return result
+        finally:
+            close_session(session)
+    
+    def cache_stats(self) -> dict:
+        """Hit/miss/eviction counters of the result cache ({} if disabled)."""
+        return self.cache.stats() if self.cache is not None else {}
+    
+    def metrics(self) -> dict:
+        """
+        Per-method counters and latency histograms ({} if disabled).
+
+        For each method called so far: calls, errors, SQL statements (total,
+        per call and the most in one call), rows fetched, time split into
+        database (executing and fetching) and Python, and a latency
+        histogram with p50/p95/p99 estimates, in milliseconds.
+        """
+        return self._metrics.snapshot() if self._metrics is not None else {}
+    
+    def reset_metrics(self):
+        """Clear every recorded call."""
+        if self._metrics is not None:
+            self._metrics.reset()
+    
+    @cached_per_user('profile')
+    def get_user_reading_profile(self, user_id: int) -> dict:
+        """
+        Get comprehensive reading profile for a user.
+
+        One statement: a CTE of the user's distinct books (first and last
+        borrowing of each) feeds GROUP BY genre for the genre shares,
+        GROUP BY author ... LIMIT 3 for the favorite authors and ORDER BY
+        borrowed_at DESC LIMIT 3 for the most recent books; UNION ALL adds
+        the user row with the loan counts. Output as get_reading_profiles:
+        a book borrowed several times counts once, author ties go to the
+        author borrowed first, recent books are listed oldest first.
+        """
+        users, books, borrowings = User.__table__, Book.__table__, Borrowing.__table__
+        mine = borrowings.c.user_id == user_id
+        read = select(
+            borrowings.c.book_id,
+            func.min(borrowings.c.id).label('first_id'),
+            func.max(borrowings.c.borrowed_at).label('last_at'),
+            func.max(borrowings.c.id).label('last_id')
+        ).where(mine).group_by(borrowings.c.book_id).cte('read')
+        read_books = read.join(books, books.c.id == read.c.book_id)
+        book_columns = [books.c[field] for field in BookRecord._fields]
+        no_book = [null().label(field) for field in BookRecord._fields]
+        count = func.count().label('count')
+        first = func.min(read.c.first_id).label('rank')
+
+        # Columns: kind, name, count, rank, then the BookRecord fields; the
+        # user row puts (total, current) in (count, rank) and its id and
+        # created_at in the book's
+        recent = select(
+            literal('recent').label('kind'), null().label('name'), null().label('count'), null().label('rank'), *book_columns
+        ).select_from(read_books).order_by(desc(read.c.last_at), desc(read.c.last_id)).limit(3).subquery()
+        authors = select(
+            literal('author').label('kind'), books.c.author.label('name'), count, first, *no_book
+        ).select_from(read_books).group_by(books.c.author).order_by(desc(count), first).limit(3).subquery()
+        genres = select(
+            literal('genre').label('kind'), books.c.genre.label('name'), count, first, *no_book
+        ).select_from(read_books).group_by(books.c.genre)
+        user = select(
+            literal('user').label('kind'), users.c.name,
+            select(func.count()).where(mine).scalar_subquery().label('count'),
+            select(func.count()).where(mine, borrowings.c.returned_at.is_(None)).scalar_subquery().label('rank'),
+            *[users.c.id if field == 'id' else users.c.created_at if field == 'created_at' else null().label(field)
+              for field in BookRecord._fields]
+        ).where(users.c.id == user_id)
+        # recent first, for the same reason as in faceted_search
+        statement = union_all(select(recent), select(authors), genres, user)
+
+        with self.engine.connect() as connection:
+            rows = connection.execute(statement).all()
+        by_kind = {'user': [], 'genre': [], 'author': [], 'recent': []}
+        for row in rows:
+            by_kind[row.kind].append(row)
+        if not by_kind['user']:
+            return {}
+        user = by_kind['user'][0]
+        genre_rows = sorted(by_kind['genre'], key=lambda row: row.rank)
+        total_books = sum(row.count for row in genre_rows)
+        return {
+            'user': {'id': user.id, 'name': user.name, 'created_at': user.created_at},
+            'total_books_borrowed': user.count,
+            'currently_borrowed': user.rank,
+            'genre_preferences': {row.name: round(row.count / total_books * 100, 1) for row in genre_rows},
+            'favorite_authors': {row.name: row.count for row in sorted(by_kind['author'], key=lambda row: (-row.count, row.rank))},
+            'most_recent_borrowings': to_records([row[4:] for row in reversed(by_kind['recent'])], BookRecord)
+        }
+    
+    # Batch per-user queries (a constant number of statements per chunk of
+    # ID_CHUNK_SIZE user ids instead of one or more per user)
+    def get_borrowed_books_for_users(self, user_ids) -> dict:
+        """Currently borrowed books for many users, as {user_id: [book dicts]}."""
+        user_ids = list(dict.fromkeys(user_ids))
+        result = {user_id: [] for user_id in user_ids}
+        session = self.get_session()
+        try:
+            for chunk in _chunks(user_ids):
+                # Borrowing.id keeps repeat loans of a book from being de-duplicated
+                rows = session.query(Borrowing.id, Borrowing.user_id, Book).join(Book, Book.id == Borrowing.book_id).filter(
+                    Borrowing.user_id.in_(chunk),
+                    Borrowing.returned_at.is_(None)
+                ).order_by(Borrowing.id).all()
+                for _, user_id, book in rows:
+                    result[user_id].append(book.to_dict())
+            return result
         finally:
             close_session(session)
+    
+    def get_preferred_genres_for_users(self, user_ids) -> dict:
+        """Genre preferences for many users, as {user_id: {genre: percent}}."""
+        user_ids = list(dict.fromkeys(user_ids))
+        session = self.get_session()
+        try:
+            return self._genre_preferences(session, user_ids)
+        finally:
+            close_session(session)
+    
+    def get_reading_profiles(self, user_ids) -> dict:
+        """
+        Reading profiles for many users, as {user_id: profile}.
+
+        Each profile has the same shape as get_user_reading_profile ({} for
+        unknown users); most_recent_borrowings are the last three distinct
+        books by borrowed_at, oldest first.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        profiles = {user_id: {} for user_id in user_ids}
+        session = self.get_session()
+        try:
+            genre_preferences = self._genre_preferences(session, user_ids)
+            for chunk in _chunks(user_ids):
+                for user in session.query(User).filter(User.id.in_(chunk)).all():
+                    profiles[user.id] = {
+                        'user': user.to_dict(),
+                        'total_books_borrowed': 0,
+                        'currently_borrowed': 0,
+                        'genre_preferences': genre_preferences[user.id],
+                        'favorite_authors': {},
+                        'most_recent_borrowings': []
+                    }
+                
+                counts = session.query(
+                    Borrowing.user_id,
+                    func.count(Borrowing.id),
+                    func.count(Borrowing.id).filter(Borrowing.returned_at.is_(None))
+                ).filter(Borrowing.user_id.in_(chunk)).group_by(Borrowing.user_id).all()
+                for user_id, total, current in counts:
+                    if profiles[user_id]:
+                        profiles[user_id]['total_books_borrowed'] = total
+                        profiles[user_id]['currently_borrowed'] = current
+                
+                # Top 3 authors per user (distinct books, ties go to the author borrowed first)
+                book_count = func.count(distinct(Borrowing.book_id))
+                authors = session.query(
+                    Borrowing.user_id, Book.author, book_count
+                ).join(Book, Book.id == Borrowing.book_id).filter(
+                    Borrowing.user_id.in_(chunk)
+                ).group_by(Borrowing.user_id, Book.author).order_by(
+                    Borrowing.user_id, desc(book_count), func.min(Borrowing.id)
+                ).all()
+                for user_id, author, count in authors:
+                    favorite_authors = profiles[user_id].get('favorite_authors')
+                    if favorite_authors is not None and len(favorite_authors) < 3:
+                        favorite_authors[author] = count
+                
+                # Latest three distinct books per user
+                latest = session.query(
+                    Borrowing.user_id.label('user_id'),
+                    Borrowing.book_id.label('book_id'),
+                    func.max(Borrowing.borrowed_at).label('borrowed_at'),
+                    func.max(Borrowing.id).label('borrowing_id')
+                ).filter(Borrowing.user_id.in_(chunk)).group_by(Borrowing.user_id, Borrowing.book_id).subquery()
+                recent = session.query(
+                    latest.c.user_id,
+                    latest.c.book_id,
+                    func.row_number().over(
+                        partition_by=latest.c.user_id,
+                        order_by=(desc(latest.c.borrowed_at), desc(latest.c.borrowing_id))
+                    ).label('position')
+                ).subquery()
+                rows = session.query(recent.c.user_id, Book).join(Book, Book.id == recent.c.book_id).filter(
+                    recent.c.position <= 3
+                ).order_by(recent.c.user_id, desc(recent.c.position)).all()
+                for user_id, book in rows:
+                    if profiles[user_id]:
+                        profiles[user_id]['most_recent_borrowings'].append(book.to_dict())
+            return profiles
+        finally:
+            close_session(session)
+    
+    def _genre_preferences(self, session, user_ids) -> dict:
+        """
+        {user_id: {genre: percent}} with one GROUP BY query per chunk of ids.
+
+        Like get_user_preferred_genres, a book borrowed several times counts once.
+        """
+        result = {user_id: {} for user_id in user_ids}
+        for chunk in _chunks(user_ids):
+            rows = session.query(
+                Borrowing.user_id, Book.genre, func.count(distinct(Borrowing.book_id))
+            ).join(Book, Book.id == Borrowing.book_id).filter(
+                Borrowing.user_id.in_(chunk)
+            ).group_by(Borrowing.user_id, Book.genre).order_by(
+                Borrowing.user_id, func.min(Borrowing.id)
+            ).all()
+            totals = Counter()
+            for user_id, _, count in rows:
+                totals[user_id] += count
+            for user_id, genre, count in rows:
+                result[user_id][genre] = round(count / totals[user_id] * 100, 1)
+        return result
+
+for _name, _method in list(vars(Library).items()):
+    if callable(_method) and not _name.startswith('_') and _name not in UNINSTRUMENTED_METHODS:
+        setattr(Library, _name, instrumented(_method))
+
+def _ranked_genres(genre_preferences: dict) -> list:
+    """Genres by preference, ties broken by name (the order every recommendation mode uses)."""
+    return sorted(genre_preferences, key=lambda genre: (-genre_preferences[genre], genre))
+
+def _like_clause(keyword, fields):
+    """OR of substring (LIKE) matches of `keyword` on the normalized columns of `fields`."""
+    keyword = normalize(keyword)
+    return or_(*[Book.__table__.c[f'{field}_norm'].contains(keyword, autoescape=True) for field in fields])
+
+def _prefix_clause(prefix, fields):
+    """Books whose normalized `fields` start with `prefix`, as index range scans."""
+    prefix = normalize(prefix)
+    columns = [Book.__table__.c[f'{field}_norm'] for field in fields]
+    if not prefix:
+        return _any_of([column >= '' for column in columns])
+    upper = prefix_upper_bound(prefix)
+    return _any_of([and_(column >= prefix, column < upper) for column in columns])
+
+def _exact_clause(value, fields):
+    """Books whose normalized `fields` equal `value`, as index lookups."""
+    value = normalize(value)
+    return _any_of([Book.__table__.c[f'{field}_norm'] == value for field in fields])
+
+def _any_of(conditions):
+    """
+    id IN (one SELECT per condition), rather than an OR that SQLite may
+    answer by scanning the table in id order for ORDER BY id LIMIT n.
+    """
+    ids = Book.__table__.c.id
+    selects = [select(ids).where(condition) for condition in conditions]
+    return ids.in_(union(*selects) if len(selects) > 1 else selects[0])
+
+def _chunks(ids):
+    """Split a list of ids into IN (...) sized chunks."""
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        yield ids[start:start + ID_CHUNK_SIZE]
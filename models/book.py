@@ -3,10 +3,11 @@ Book model for Smart Library System.
 Simple ORM model using SQLAlchemy.
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, DateTime, DDL, Index, event, text
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime
 from db_init import Base
+from normalization import normalize, normalized_default
 
 class Book(Base):
     """Book model."""
@@ -20,10 +21,23 @@ class Book(Base):
     year = Column(Integer, nullable=False)
     rating = Column(Float, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Normalized (case-folded, accent-stripped) shadows of the searchable
+    # columns: set on ORM assignment by _normalize below, and by the column
+    # defaults for Core inserts
+    title_norm = Column(String, nullable=False, default=normalized_default('title'))
+    author_norm = Column(String, nullable=False, default=normalized_default('author'))
+    genre_norm = Column(String, nullable=False, default=normalized_default('genre'))
     
     # Relationship with borrowing history
     borrowings = relationship("Borrowing", back_populates="book")
     
+    @validates('title', 'author', 'genre')
+    def _normalize(self, key, value):
+        """Keep the *_norm shadow column in step with title/author/genre."""
+        setattr(self, f'{key}_norm', normalize(value))
+        return value
+
     def __repr__(self):
         return f"<Book(id={self.id}, title='{self.title}', author='{self.author}')>"
     
@@ -38,3 +52,80 @@ class Book(Base):
             'rating': self.rating,
             'created_at': self.created_at
         }
+
+
+# Best-rated books of a genre (recommend_books) and overall (get_top_rated_books)
+Index("ix_books_genre_rating", Book.genre, Book.rating.desc())
+Index("ix_books_rating", Book.rating.desc())
+# Year range filters (faceted_search)
+Index("ix_books_year", Book.year)
+# Case- and accent-insensitive equality and prefix (range) lookups
+Index("ix_books_title_norm", Book.title_norm)
+Index("ix_books_author_norm", Book.author_norm)
+Index("ix_books_genre_norm", Book.genre_norm)
+
+# Full-text index mirroring the books table (SQLite FTS5, external content).
+# Triggers keep it in sync for ORM inserts and Core bulk inserts alike.
+FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+        title, author, genre,
+        content='books', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, title, author, genre)
+        VALUES (new.id, new.title, new.author, new.genre);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, genre)
+        VALUES ('delete', old.id, old.title, old.author, old.genre);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author, genre ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, genre)
+        VALUES ('delete', old.id, old.title, old.author, old.genre);
+        INSERT INTO books_fts(rowid, title, author, genre)
+        VALUES (new.id, new.title, new.author, new.genre);
+    END""",
+]
+
+for statement in FTS_DDL:
+    event.listen(Book.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Book.__table__, "before_drop", DDL("DROP TABLE IF EXISTS books_fts").execute_if(dialect="sqlite"))
+
+NORMALIZED_COLUMNS = {'title_norm': 'title', 'author_norm': 'author', 'genre_norm': 'genre'}
+BACKFILL_BATCH_SIZE = 10000
+
+@event.listens_for(Base.metadata, "after_create")
+def upgrade_books_table(target, connection, **kw):
+    """
+    Bring a books table created by an older schema up to date: create_all
+    skips existing tables, so add and backfill the normalized columns and
+    create (and fill) books_fts if they are missing.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    existing = {row[1] for row in connection.execute(text("PRAGMA table_info(books)"))}
+    if not existing:
+        return
+    missing = [column for column in NORMALIZED_COLUMNS if column not in existing]
+    for column in missing:
+        connection.execute(text(f"ALTER TABLE books ADD COLUMN {column} VARCHAR NOT NULL DEFAULT ''"))
+    if missing:
+        last_id = 0
+        while True:
+            rows = connection.execute(text(
+                "SELECT id, title, author, genre FROM books WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ), {'last_id': last_id, 'limit': BACKFILL_BATCH_SIZE}).all()
+            if not rows:
+                break
+            connection.execute(
+                text("UPDATE books SET " + ", ".join(f"{column} = :{column}" for column in missing) + " WHERE id = :id"),
+                [{'id': row.id, **{column: normalize(getattr(row, NORMALIZED_COLUMNS[column])) for column in missing}}
+                 for row in rows]
+            )
+            last_id = rows[-1].id
+    has_fts = connection.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'books_fts'")).first()
+    for statement in FTS_DDL:
+        connection.execute(text(statement))
+    if not has_fts:
+        connection.execute(text("INSERT INTO books_fts(books_fts) VALUES ('rebuild')"))
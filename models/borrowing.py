@@ -3,7 +3,7 @@ Borrowing model for Smart Library System.
 Simple ORM model using SQLAlchemy.
 """
 
-from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from db_init import Base
@@ -12,6 +12,14 @@ class Borrowing(Base):
     """Borrowing history model."""
     
     __tablename__ = "borrowings"
+    __table_args__ = (
+        # a user's borrowings (profiles, preferred genres, NOT IN borrowed ids);
+        # borrowed_at makes it covering for the per-book aggregates of profiles
+        Index("ix_borrowings_user_book", "user_id", "book_id", "borrowed_at"),
+        # open loans only: return_book and get_user_borrowed_books
+        Index("ix_borrowings_active", "user_id", "book_id",
+              sqlite_where=text("returned_at IS NULL"), postgresql_where=text("returned_at IS NULL")),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
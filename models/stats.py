@@ -0,0 +1,124 @@
+"""
+Statistics models for Smart Library System.
+Counters maintained incrementally by SQLite triggers.
+"""
+
+from sqlalchemy import Column, Integer, String, Float, event, text
+from db_init import Base
+
+class LibraryStats(Base):
+    """Single-row table (id=1) of library-wide counters."""
+
+    __tablename__ = "library_stats"
+
+    id = Column(Integer, primary_key=True)
+    total_books = Column(Integer, nullable=False, default=0)
+    total_users = Column(Integer, nullable=False, default=0)
+    total_borrowings = Column(Integer, nullable=False, default=0)
+    active_loans = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Float, nullable=False, default=0.0)
+    rating_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<LibraryStats(books={self.total_books}, users={self.total_users}, active_loans={self.active_loans})>"
+
+    def to_dict(self):
+        """Convert to dictionary."""
+        return {
+            'total_books': self.total_books,
+            'total_users': self.total_users,
+            'total_borrowings': self.total_borrowings,
+            'active_loans': self.active_loans,
+            'rating_sum': self.rating_sum,
+            'rating_count': self.rating_count
+        }
+
+class GenreStats(Base):
+    """Number of books per genre."""
+
+    __tablename__ = "genre_stats"
+
+    genre = Column(String, primary_key=True)
+    book_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<GenreStats(genre='{self.genre}', book_count={self.book_count})>"
+
+# Recompute every counter from the base tables
+RECOMPUTE_SQL = {
+    'library_stats': """
+        SELECT
+            (SELECT COUNT(*) FROM books) AS total_books,
+            (SELECT COUNT(*) FROM users) AS total_users,
+            (SELECT COUNT(*) FROM borrowings) AS total_borrowings,
+            (SELECT COUNT(*) FROM borrowings WHERE returned_at IS NULL) AS active_loans,
+            (SELECT COALESCE(SUM(rating), 0.0) FROM books) AS rating_sum,
+            (SELECT COUNT(rating) FROM books) AS rating_count
+    """,
+    'genre_stats': "SELECT genre, COUNT(*) FROM books GROUP BY genre"
+}
+
+STATS_DDL = [
+    "INSERT OR IGNORE INTO library_stats (id, total_books, total_users, total_borrowings, active_loans, rating_sum, rating_count) "
+    "SELECT 1, * FROM (" + RECOMPUTE_SQL['library_stats'] + ")",
+    "INSERT OR IGNORE INTO genre_stats (genre, book_count) " + RECOMPUTE_SQL['genre_stats'],
+    """CREATE TRIGGER IF NOT EXISTS stats_books_ai AFTER INSERT ON books BEGIN
+        UPDATE library_stats SET
+            total_books = total_books + 1,
+            rating_sum = rating_sum + COALESCE(new.rating, 0),
+            rating_count = rating_count + (new.rating IS NOT NULL)
+        WHERE id = 1;
+        INSERT INTO genre_stats (genre, book_count) VALUES (new.genre, 1)
+            ON CONFLICT (genre) DO UPDATE SET book_count = book_count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stats_books_ad AFTER DELETE ON books BEGIN
+        UPDATE library_stats SET
+            total_books = total_books - 1,
+            rating_sum = rating_sum - COALESCE(old.rating, 0),
+            rating_count = rating_count - (old.rating IS NOT NULL)
+        WHERE id = 1;
+        UPDATE genre_stats SET book_count = book_count - 1 WHERE genre = old.genre;
+        DELETE FROM genre_stats WHERE genre = old.genre AND book_count <= 0;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stats_books_au AFTER UPDATE OF rating, genre ON books BEGIN
+        UPDATE library_stats SET
+            rating_sum = rating_sum - COALESCE(old.rating, 0) + COALESCE(new.rating, 0),
+            rating_count = rating_count - (old.rating IS NOT NULL) + (new.rating IS NOT NULL)
+        WHERE id = 1;
+        UPDATE genre_stats SET book_count = book_count - 1 WHERE genre = old.genre;
+        DELETE FROM genre_stats WHERE genre = old.genre AND book_count <= 0;
+        INSERT INTO genre_stats (genre, book_count) VALUES (new.genre, 1)
+            ON CONFLICT (genre) DO UPDATE SET book_count = book_count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stats_users_ai AFTER INSERT ON users BEGIN
+        UPDATE library_stats SET total_users = total_users + 1 WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stats_users_ad AFTER DELETE ON users BEGIN
+        UPDATE library_stats SET total_users = total_users - 1 WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stats_borrowings_ai AFTER INSERT ON borrowings BEGIN
+        UPDATE library_stats SET
+            total_borrowings = total_borrowings + 1,
+            active_loans = active_loans + (new.returned_at IS NULL)
+        WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stats_borrowings_au AFTER UPDATE OF returned_at ON borrowings BEGIN
+        UPDATE library_stats SET
+            active_loans = active_loans - (old.returned_at IS NULL) + (new.returned_at IS NULL)
+        WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stats_borrowings_ad AFTER DELETE ON borrowings BEGIN
+        UPDATE library_stats SET
+            total_borrowings = total_borrowings - 1,
+            active_loans = active_loans - (old.returned_at IS NULL)
+        WHERE id = 1;
+    END""",
+]
+
+@event.listens_for(Base.metadata, "after_create")
+def create_stats_triggers(target, connection, **kw):
+    """Seed the counters and install the triggers once every table exists."""
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in STATS_DDL:
+        connection.execute(text(statement))
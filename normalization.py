@@ -0,0 +1,28 @@
+"""
+Text normalization for Smart Library System.
+One definition of "the same text" shared by the normalized search columns,
+the in-memory indexes and the snapshot.
+"""
+
+import unicodedata
+
+def normalize(value: str) -> str:
+    """Case-folded `value` without accents, with runs of whitespace collapsed."""
+    if value.isascii():
+        return ' '.join(value.casefold().split())
+    decomposed = unicodedata.normalize('NFKD', value)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+def normalized_default(column: str):
+    """
+    Column default computing normalize() of `column` from the statement's
+    parameters, so Core inserts (executemany included) fill it too.
+    """
+    def default(context):
+        return normalize(context.get_current_parameters()[column])
+    return default
+
+def prefix_upper_bound(prefix: str) -> str:
+    """Smallest string greater than every string starting with `prefix` (non-empty)."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
@@ -0,0 +1,22 @@
+"""
+Keyset pagination cursors for Smart Library System.
+Opaque, URL-safe tokens carrying the last id of the previous page.
+"""
+
+import base64
+import json
+
+def encode_cursor(kind: str, last_id: int) -> str:
+    """Opaque cursor resuming a `kind` listing after `last_id`."""
+    payload = json.dumps({'k': kind, 'id': last_id}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_cursor(cursor: str, kind: str) -> int:
+    """Last id stored in `cursor`; ValueError if it is malformed or from another listing."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if payload['k'] == kind and isinstance(payload['id'], int):
+            return payload['id']
+    except (ValueError, TypeError, KeyError):
+        pass
+    raise ValueError(f"Invalid {kind} cursor: {cursor!r}")
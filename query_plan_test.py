@@ -0,0 +1,109 @@
+"""
+Query plan test for Smart Library System.
+Runs EXPLAIN QUERY PLAN on every statement each Library method issues and
+fails if one of them scans a table (in table or index order) instead of
+searching an index, unless the method is allow-listed below.
+"""
+
+import os
+import re
+import tempfile
+from sqlalchemy import event
+from db_init import Base, init_db, resolve_engine
+from library import Library
+from benchmarks.suite import BENCHMARKS, Context, call_benchmark, populate, setup_benchmark
+
+# Benchmarks that scan a table by design. Every entry must still scan:
+# an entry whose method no longer does fails the test, so it gets removed
+ALLOWED_SCANS = {
+    'get_all_books': 'returns every book',
+    'get_all_books[lean]': 'returns every book',
+    'iter_books': 'returns every book',
+    'export_snapshot': 'copies every book',
+    'get_all_users': 'returns every user',
+    'iter_users': 'returns every user',
+    'naive_search_books': 'linear search by definition',
+    'search_books': "LIKE '%keyword%' cannot use a B-tree index",
+    'iter_search': "LIKE '%keyword%' cannot use a B-tree index",
+    'rebuild_trigram_index': 'reads every book',
+    'rebuild_fuzzy_index': 'reads every book',
+    'rebuild_autocomplete_index': 'reads every book in rating order',
+    'rebuild_recommendation_index': 'reads every book in (genre, rating) order',
+    'build_collaborative_model': 'reads every borrowing',
+    'reconcile_statistics': 'recounts every table',
+    'get_top_rated_books': 'walks ix_books_rating from the top and stops after `limit` rows',
+}
+
+# Tables small enough that a scan is fine (one row per genre / a single row)
+SMALL_TABLES = {'genre_stats', 'library_stats'}
+
+# Plan rows naming a table: 'SCAN books', 'SCAN books USING COVERING INDEX ix',
+# 'SEARCH books_1 USING INDEX ix (rating>?)', 'SCAN TABLE books' before SQLite 3.36
+PLAN_TABLE = re.compile(r'^(SCAN|SEARCH) (?:TABLE )?(\w+)')
+
+# 'FROM books AS books_1': plan rows name the alias
+TABLE_ALIAS = re.compile(r'\b(\w+) AS (\w+)\b')
+
+def record_statements(engine, statements):
+    """Append (statement, parameters) of every single-row-set statement to `statements`."""
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH', 'UPDATE', 'DELETE')):
+            statements.append((statement, parameters))
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+
+def full_scans(engine, statement, parameters) -> list[str]:
+    """Plan lines reading a table of the schema other than by an index SEARCH."""
+    tables = set(Base.metadata.tables) - SMALL_TABLES
+    aliases = {alias: table for table, alias in TABLE_ALIAS.findall(statement) if table in tables}
+    with engine.connect() as connection:
+        plan = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    scans = []
+    for row in plan:
+        match = PLAN_TABLE.match(row[-1])
+        if match and match.group(1) != 'SEARCH' and aliases.get(match.group(2), match.group(2)) in tables:
+            scans.append(row[-1])
+    return scans
+
+def test_query_plans():
+    """Check every benchmarked Library method."""
+    print("Testing query plans...")
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        engine = resolve_engine('sqlite:///' + os.path.join(directory, 'plans.db'))
+        init_db(engine)
+        library = Library(engine)
+        populate(library, 2000, 200)
+        context = Context(2000, 200, directory)
+
+        statements = []
+        record_statements(engine, statements)
+        for i, name in enumerate(BENCHMARKS):
+            # a first, unrecorded call absorbs lazy index builds
+            setup_benchmark(library, context, name, 2 * i)
+            call_benchmark(library, context, name, 2 * i)
+            setup_benchmark(library, context, name, 2 * i + 1)
+            statements.clear()
+            call_benchmark(library, context, name, 2 * i + 1)
+            recorded = list(statements)
+            scans = sorted({scan for statement, parameters in recorded for scan in full_scans(engine, statement, parameters)})
+            if not scans and name in ALLOWED_SCANS:
+                failures += 1
+                print(f"  FAIL     {name}: allowed to scan but does not, remove it from ALLOWED_SCANS")
+            elif not scans:
+                print(f"  ok       {name} ({len(recorded)} statements)")
+            elif name in ALLOWED_SCANS:
+                print(f"  allowed  {name}: {', '.join(scans)} ({ALLOWED_SCANS[name]})")
+            else:
+                failures += 1
+                print(f"  FAIL     {name}: {', '.join(scans)}")
+                for statement, parameters in recorded:
+                    if full_scans(engine, statement, parameters):
+                        print("           " + " ".join(statement.split()))
+        engine.dispose()
+    stale = set(ALLOWED_SCANS) - set(BENCHMARKS)
+    assert not stale, f"ALLOWED_SCANS names unknown benchmarks: {sorted(stale)}"
+    assert not failures, f"{failures} method(s) scan a table or are wrongly allow-listed"
+    print("Query plan test passed!")
+
+if __name__ == "__main__":
+    test_query_plans()
@@ -2,10 +2,9 @@
 Comprehensive demonstration of the recommendation system.
 """
 
-from db_init import init_db, get_session, close_session
+from db_init import init_db, get_session
 from library import Library
 from models.book import Book
-from models.user import User
 import json
 
 def demo_recommendation_system():
@@ -18,22 +17,15 @@ def demo_recommendation_system():
     with open('books.json', 'r') as f:
         book_set = json.load(f)
     
-    session = get_session()
-    for book_data in book_set:
-        session.add(Book(**book_data))
-    session.commit()
-    close_session(session)
+    report = library.bulk_add_books(book_set)
     
     with open('users.json', 'r') as f:
         user_set = json.load(f)
     
-    session = get_session()
-    for user_data in user_set:
-        session.add(User(**user_data))
-    session.commit()
-    close_session(session)
+    library.bulk_add_users(user_set)
     
-    print(f"Loaded {len(book_set)} books and {len(user_set)} users into database.\n")
+    print(f"Loaded {len(book_set)} books and {len(user_set)} users into database.")
+    print(f"Book import rate: {report['rows_per_sec']:.0f} rows/sec\n")
     
     print("=== Scenario 1: New User (No Borrowing History) ===")
     new_user = library.add_user("New Reader")
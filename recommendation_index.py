@@ -0,0 +1,78 @@
+"""
+In-memory recommendation index for Smart Library System.
+Keeps book ids sorted by rating, per genre and globally.
+"""
+
+import heapq
+from bisect import insort
+
+class RecommendationIndex:
+    """
+    Rating-sorted book lists used by Library.recommend_books(mode='index').
+
+    Entries are (-rating, book_id) tuples, so each list is ordered best-rated
+    first with ties broken by id. Borrowed books are skipped while walking the
+    lists, so no NOT IN (...) query is needed however long the history is.
+    """
+
+    def __init__(self):
+        self.by_genre = {}
+        self.all_books = []
+
+    def __len__(self):
+        return len(self.all_books)
+
+    def add(self, book_id: int, genre: str, rating: float):
+        """Insert one book, keeping every list sorted."""
+        entry = (-rating, book_id)
+        insort(self.by_genre.setdefault(genre, []), entry)
+        insort(self.all_books, entry)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from (book_id, genre, rating) rows with one sort per list."""
+        index = cls()
+        for book_id, genre, rating in rows:
+            entry = (-rating, book_id)
+            index.by_genre.setdefault(genre, []).append(entry)
+            index.all_books.append(entry)
+        for entries in index.by_genre.values():
+            entries.sort()
+        index.all_books.sort()
+        return index
+
+    @staticmethod
+    def _take(entries, exclude: set, limit: int) -> list[int]:
+        """First `limit` ids from `entries` that are not in `exclude`."""
+        result = []
+        if limit <= 0:
+            return result
+        for _, book_id in entries:
+            if book_id not in exclude:
+                result.append(book_id)
+                if len(result) >= limit:
+                    break
+        return result
+
+    def top_rated(self, limit: int, exclude=frozenset()) -> list[int]:
+        """Best-rated book ids overall."""
+        return self._take(self.all_books, exclude, limit)
+
+    def recommend(self, genres, borrowed: set, limit: int) -> list[int]:
+        """
+        Book ids for a reader whose preferred `genres` are given best first.
+
+        Like the SQL version of recommend_books, genres are filled in order of
+        preference; if they run out, the remaining slots come from a heap-based
+        k-way merge of the other genres' lists (i.e. the best-rated books the
+        reader has neither borrowed nor been recommended).
+        """
+        picked = []
+        for genre in genres:
+            picked.extend(self._take(self.by_genre.get(genre, ()), borrowed, limit))
+            if len(picked) >= limit:
+                return picked[:limit]
+        preferred = set(genres)
+        others = [entries for genre, entries in self.by_genre.items() if genre not in preferred]
+        picked.extend(self._take(heapq.merge(*others), borrowed, limit - len(picked)))
+        return picked
@@ -0,0 +1,51 @@
+"""
+Recommendation test for Smart Library System.
+Checks that recommend_books gives the same books in mode='sql' and
+mode='index', on a catalog full of tied ratings and readers whose genre
+preferences tie.
+"""
+
+import os
+import random
+import tempfile
+from db_init import init_db, resolve_engine
+from library import Library
+
+GENRES = ['Fantasy', 'Fiction', 'History', 'Mystery', 'Science']
+
+def populate(library, n_books=100, n_users=30, seed=0):
+    """Books with ratings from a handful of values, users with 2-8 borrowings."""
+    rng = random.Random(seed)
+    library.bulk_add_books(
+        {'title': f'Book {i}', 'author': f'Author {i % 9}', 'genre': GENRES[i % len(GENRES)],
+         'year': 1950 + i % 70, 'rating': rng.choice([3.0, 4.0, 4.5, 5.0])}
+        for i in range(n_books)
+    )
+    library.bulk_add_users({'name': f'user{i}'} for i in range(n_users))
+    for user_id in range(1, n_users + 1):
+        for _ in range(rng.randint(2, 8)):
+            library.borrow_book(user_id, rng.randint(1, n_books))
+
+def test_recommendation_modes():
+    """Same ids, in the same order, from both modes for every user and several limits."""
+    print("Testing recommendation modes...")
+    with tempfile.TemporaryDirectory() as directory:
+        engine = resolve_engine('sqlite:///' + os.path.join(directory, 'recommend.db'))
+        init_db(engine)
+        library = Library(engine)
+        populate(library)
+        mismatches = 0
+        for user_id in range(1, 32): # the last id has no history
+            for limit in (1, 5, 30):
+                sql = [book['id'] for book in library.recommend_books(user_id, limit=limit)]
+                index = [book['id'] for book in library.recommend_books(user_id, limit=limit, mode='index')]
+                if sql != index:
+                    mismatches += 1
+                    print(f"  FAIL     user {user_id} limit {limit}: sql {sql} index {index}")
+        library.close()
+        engine.dispose()
+    assert not mismatches, f"{mismatches} recommendation lists differ between modes"
+    print("Recommendation test passed!")
+
+if __name__ == "__main__":
+    test_recommendation_modes()
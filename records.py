@@ -0,0 +1,45 @@
+"""
+Lean read records for Smart Library System.
+Column-only Core selects turned into tuples or dicts without ORM entities.
+"""
+
+from typing import NamedTuple
+from datetime import datetime
+from sqlalchemy import select
+from models.book import Book
+from models.user import User
+
+class BookRecord(NamedTuple):
+    """Immutable book row (same fields as Book.to_dict())."""
+    id: int
+    title: str
+    author: str
+    genre: str
+    year: int
+    rating: float
+    created_at: datetime
+
+class UserRecord(NamedTuple):
+    """Immutable user row (same fields as User.to_dict())."""
+    id: int
+    name: str
+    created_at: datetime
+
+BOOK_COLUMNS = tuple(Book.__table__.c[field] for field in BookRecord._fields)
+USER_COLUMNS = tuple(User.__table__.c[field] for field in UserRecord._fields)
+
+def select_books():
+    """SELECT of the BookRecord columns of books."""
+    return select(*BOOK_COLUMNS)
+
+def select_users():
+    """SELECT of the UserRecord columns of users."""
+    return select(*USER_COLUMNS)
+
+def to_records(rows, record_type, records: bool = False) -> list:
+    """Row tuples as `record_type` tuples (records=True) or plain dicts."""
+    if records:
+        make = record_type._make
+        return [make(row) for row in rows]
+    fields = record_type._fields
+    return [dict(zip(fields, row)) for row in rows]
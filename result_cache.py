@@ -0,0 +1,144 @@
+"""
+Per-user result cache for Smart Library System.
+Bounded LRU with optional TTL and write-driven invalidation.
+"""
+
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+class ResultCache:
+    """
+    LRU cache of per-user results.
+
+    Keys are (namespace, user_id, arguments). At most `maxsize` entries are
+    kept (least recently used are evicted first) and, if `ttl` is set,
+    entries older than `ttl` seconds count as misses. Entries are indexed by
+    user and by namespace so writes can drop exactly the affected results.
+    Every invalidation bumps `generation`; a result computed from a read
+    that started before it is refused by set(), so a read racing a write
+    cannot store a stale value after the write invalidated the cache.
+    Values are deep-copied in and out, so callers may mutate what they get.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict() # key -> (expires_at, value)
+        self._by_user = {}
+        self._by_namespace = {}
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return (True, value) on a hit, (False, None) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, copy.deepcopy(entry[1])
+            if entry is not None:
+                self._discard(key)
+                self.evictions += 1
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value, generation: int = None):
+        """
+        Store `value`; `key` must be (namespace, user_id, ...). With
+        `generation` (read before computing `value`), nothing is stored if
+        the cache has been invalidated since.
+        """
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (expires_at, copy.deepcopy(value))
+            self._by_namespace.setdefault(key[0], set()).add(key)
+            self._by_user.setdefault(key[1], set()).add(key)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id):
+        """Drop every cached result for `user_id`."""
+        with self._lock:
+            self.generation += 1
+            for key in list(self._by_user.get(user_id, ())):
+                self._discard(key)
+                self.invalidations += 1
+
+    def invalidate_namespace(self, namespace: str):
+        """Drop every cached result in `namespace` (e.g. all recommendations)."""
+        with self._lock:
+            self.generation += 1
+            for key in list(self._by_namespace.get(namespace, ())):
+                self._discard(key)
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop everything (counters are kept)."""
+        with self._lock:
+            self.generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_user.clear()
+            self._by_namespace.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'maxsize': self.maxsize
+            }
+
+    def _discard(self, key):
+        """Remove `key` from the entries and both indexes (lock held)."""
+        self._entries.pop(key, None)
+        for index, name in ((self._by_namespace, key[0]), (self._by_user, key[1])):
+            keys = index.get(name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[name]
+
+def cached_per_user(namespace: str):
+    """
+    Cache a Library method whose first argument is a user id in `self.cache`.
+
+    Does nothing when the library was created without a cache.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, user_id, *args, **kwargs):
+            if self.cache is None:
+                return method(self, user_id, *args, **kwargs)
+            key = (namespace, user_id, args, tuple(sorted(kwargs.items())))
+            generation = self.cache.generation
+            hit, value = self.cache.get(key)
+            if hit:
+                return value
+            value = method(self, user_id, *args, **kwargs)
+            self.cache.set(key, value, generation)
+            return value
+        return wrapper
+    return decorator
@@ -0,0 +1,263 @@
+"""
+Columnar catalog snapshot for Smart Library System.
+Exports the books table to flat binary columns and memory-maps them back.
+
+Layout of a snapshot directory:
+    meta.json                        row count, column dtypes, genre dictionary
+    id.bin, year.bin, rating.bin     fixed-width NumPy columns
+    genre.bin                        dictionary codes into meta.json's genres
+    title.offsets, title.blob        UTF-8 strings: row i is blob[offsets[i]:offsets[i + 1]]
+    author.offsets, author.blob
+    title_norm.*, author_norm.*      normalized title/author (normalization.normalize) for search
+"""
+
+import json
+import mmap
+import os
+import shutil
+import numpy as np
+from sqlalchemy import select
+from models.book import Book
+from normalization import normalize
+
+SNAPSHOT_VERSION = 2
+FIXED_COLUMNS = {'id': '<i8', 'year': '<i4', 'rating': '<f8', 'genre': '<u2'}
+STRING_COLUMNS = ('title', 'author', 'title_norm', 'author_norm')
+OFFSET_DTYPE = '<i8'
+
+class SnapshotWriter:
+    """
+    Append-only writer of a snapshot directory.
+
+    Columns are appended batch by batch (rows must arrive in id order) and
+    written straight to disk in a temporary sibling directory; close()
+    writes meta.json there and swaps it in for `directory`. Used as a
+    context manager, it closes on success and on error removes the
+    temporary directory, leaving any previous snapshot untouched.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = os.path.normpath(directory)
+        self.building = f'{self.directory}.{os.getpid()}.tmp'
+        shutil.rmtree(self.building, ignore_errors=True)
+        os.makedirs(self.building)
+        self.rows = 0
+        self.genres = {}
+        self.meta = None
+        self._offsets = {name: 0 for name in STRING_COLUMNS}
+        self._files = {name: open(os.path.join(self.building, f'{name}.bin'), 'wb') for name in FIXED_COLUMNS}
+        for name in STRING_COLUMNS:
+            self._files[f'{name}.offsets'] = open(os.path.join(self.building, f'{name}.offsets'), 'wb')
+            self._files[f'{name}.blob'] = open(os.path.join(self.building, f'{name}.blob'), 'wb')
+            self._files[f'{name}.offsets'].write(np.zeros(1, dtype=OFFSET_DTYPE).tobytes())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            for f in self._files.values():
+                f.close()
+            shutil.rmtree(self.building, ignore_errors=True)
+
+    def append(self, ids, years, ratings, genres, titles, authors):
+        """Append one batch of rows given as parallel sequences."""
+        codes = [self.genres.setdefault(genre, len(self.genres)) for genre in genres]
+        if len(self.genres) > np.iinfo(FIXED_COLUMNS['genre']).max + 1:
+            raise ValueError("Too many distinct genres for the snapshot format")
+        for name, values in (('id', ids), ('year', years), ('rating', ratings), ('genre', codes)):
+            self._files[name].write(np.asarray(values, dtype=FIXED_COLUMNS[name]).tobytes())
+        titles, authors = list(titles), list(authors)
+        for name, values in (('title', titles), ('author', authors),
+                             ('title_norm', map(normalize, titles)), ('author_norm', map(normalize, authors))):
+            encoded = [value.encode('utf-8') for value in values]
+            ends = self._offsets[name] + np.cumsum([len(value) for value in encoded], dtype=np.int64)
+            self._files[f'{name}.blob'].write(b''.join(encoded))
+            self._files[f'{name}.offsets'].write(ends.astype(OFFSET_DTYPE).tobytes())
+            if len(ends):
+                self._offsets[name] = int(ends[-1])
+        self.rows += len(codes)
+
+    def close(self) -> dict:
+        """Flush every column, write meta.json and move the snapshot into place; return the metadata."""
+        for f in self._files.values():
+            f.close()
+        self.meta = meta = {
+            'version': SNAPSHOT_VERSION,
+            'rows': self.rows,
+            'columns': dict(FIXED_COLUMNS),
+            'string_columns': list(STRING_COLUMNS),
+            'offset_dtype': OFFSET_DTYPE,
+            'genres': list(self.genres)
+        }
+        with open(os.path.join(self.building, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+        if os.path.isdir(self.directory):
+            # a directory cannot be renamed over a non-empty one: move the old snapshot aside first
+            previous = f'{self.building}.old'
+            os.replace(self.directory, previous)
+            os.replace(self.building, self.directory)
+            shutil.rmtree(previous)
+        else:
+            os.replace(self.building, self.directory)
+        return meta
+
+def export_snapshot(engine, directory: str, batch_size: int = 100000) -> dict:
+    """
+    Write every book (in id order) to a snapshot in `directory`.
+
+    Rows are streamed `batch_size` at a time, so memory stays bounded.
+    Returns the snapshot metadata.
+    """
+    table = Book.__table__
+    statement = select(table.c.id, table.c.year, table.c.rating, table.c.genre,
+                       table.c.title, table.c.author).order_by(table.c.id)
+    with SnapshotWriter(directory) as writer, engine.connect() as connection:
+        result = connection.execution_options(yield_per=batch_size).execute(statement)
+        for batch in result.partitions():
+            writer.append(*zip(*batch))
+    return writer.meta
+
+def _map_array(path, dtype, count):
+    """Read-only memory map of `count` items of `dtype` (empty array if count is 0)."""
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+
+def _map_bytes(path):
+    """Read-only mmap of a whole file (b'' if it is empty)."""
+    if os.path.getsize(path) == 0:
+        return b''
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+class StringColumn:
+    """Memory-mapped UTF-8 strings addressed by row through an offsets array."""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return self.blob[self.offsets[row]:self.offsets[row + 1]].decode('utf-8')
+
+    def find(self, keyword: str) -> np.ndarray:
+        """Sorted rows whose value contains `keyword` (case-sensitive)."""
+        if not keyword:
+            return np.arange(len(self))
+        needle = keyword.encode('utf-8')
+        rows = []
+        position = self.blob.find(needle)
+        while position != -1:
+            row = int(np.searchsorted(self.offsets, position, side='right')) - 1
+            end = int(self.offsets[row + 1])
+            if position + len(needle) <= end:
+                rows.append(row)
+            # one hit per row is enough; a hit straddling two values means
+            # every later one in this row does too
+            position = self.blob.find(needle, end)
+        return np.array(rows, dtype=np.int64)
+
+class CatalogSnapshot:
+    """
+    Read-only columnar view of the books table.
+
+    Every column is memory-mapped, so loading costs a few system calls
+    whatever the catalog size, and scans read the pages they touch straight
+    from the page cache without copying rows into Python objects.
+    """
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {self.meta.get('version')}")
+        rows = self.meta['rows']
+        columns = self.meta['columns']
+        self.directory = directory
+        self.genres = self.meta['genres']
+        self.id = _map_array(os.path.join(directory, 'id.bin'), columns['id'], rows)
+        self.year = _map_array(os.path.join(directory, 'year.bin'), columns['year'], rows)
+        self.rating = _map_array(os.path.join(directory, 'rating.bin'), columns['rating'], rows)
+        self.genre_codes = _map_array(os.path.join(directory, 'genre.bin'), columns['genre'], rows)
+        for name in self.meta['string_columns']:
+            offsets = _map_array(os.path.join(directory, f'{name}.offsets'), self.meta['offset_dtype'], rows + 1)
+            if rows == 0:
+                offsets = np.zeros(1, dtype=self.meta['offset_dtype'])
+            setattr(self, name, StringColumn(offsets, _map_bytes(os.path.join(directory, f'{name}.blob'))))
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def book(self, row: int) -> dict:
+        """Row `row` as a dict (the fields of Book.to_dict() except created_at)."""
+        return {
+            'id': int(self.id[row]),
+            'title': self.title[row],
+            'author': self.author[row],
+            'genre': self.genres[self.genre_codes[row]],
+            'year': int(self.year[row]),
+            'rating': float(self.rating[row])
+        }
+
+    def books(self, rows) -> list[dict]:
+        return [self.book(int(row)) for row in rows]
+
+    def row_of(self, book_id: int) -> int:
+        """Row holding `book_id` (binary search on the sorted id column); KeyError if absent."""
+        row = int(np.searchsorted(self.id, book_id))
+        if row == len(self) or self.id[row] != book_id:
+            raise KeyError(book_id)
+        return row
+
+    # Analytics
+    def genre_counts(self) -> dict:
+        """Number of books per genre."""
+        counts = np.bincount(self.genre_codes, minlength=len(self.genres))
+        return {genre: int(count) for genre, count in sorted(zip(self.genres, counts)) if count}
+
+    def average_rating(self) -> float:
+        return float(self.rating.mean()) if len(self) else 0.0
+
+    def books_per_decade(self) -> dict:
+        """Number of books per decade (1990 -> books from 1990 to 1999)."""
+        decades, counts = np.unique(self.year // 10 * 10, return_counts=True)
+        return {int(decade): int(count) for decade, count in zip(decades, counts)}
+
+    def top_rated(self, limit: int = 10) -> list[dict]:
+        """Highest-rated books, ties broken by id."""
+        if limit <= 0 or not len(self):
+            return []
+        if len(self) > limit:
+            candidates = np.argpartition(-self.rating, limit - 1)[:limit]
+            # include every book tied with the cut-off rating before ordering
+            candidates = np.flatnonzero(self.rating >= self.rating[candidates].min())
+        else:
+            candidates = np.arange(len(self))
+        order = np.lexsort((self.id[candidates], -self.rating[candidates]))
+        return self.books(candidates[order][:limit])
+
+    # Scans
+    def search(self, keyword: str) -> list[dict]:
+        """
+        Books whose title, author or genre contains `keyword`, in id order.
+
+        Same matches as Library.naive_search_books, found by scanning the
+        mapped normalized title/author blobs and matching the genre
+        dictionary once.
+        """
+        keyword = normalize(keyword)
+        genre_codes = [code for code, genre in enumerate(self.genres) if keyword in normalize(genre)]
+        hits = [self.title_norm.find(keyword), self.author_norm.find(keyword)]
+        if genre_codes:
+            hits.append(np.flatnonzero(np.isin(self.genre_codes, genre_codes)))
+        return self.books(np.unique(np.concatenate(hits)))
+
+def load_snapshot(directory: str) -> CatalogSnapshot:
+    """Memory-map the snapshot in `directory`."""
+    return CatalogSnapshot(directory)
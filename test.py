@@ -2,10 +2,8 @@
 Simple test for Smart Library System.
 """
 
-from db_init import init_db, get_session, close_session
+from db_init import init_db
 from library import Library
-from models.book import Book
-from models.user import User
 import json
 import time
 
@@ -23,11 +21,8 @@ def test():
     with open('books.json', 'r') as f: # Read JSON file
         book_set = json.load(f)
 
-    session = get_session()
-    for i in book_set:
-        session.add(Book(**i))
-    session.commit()
-    close_session(session=session)
+    report = library.bulk_add_books(book_set)
+    print(f"Loaded {report['rows']} books at {report['rows_per_sec']:.0f} rows/sec")
 
     # Manually add book
     book = library.add_book("Python Guide", "John Doe", "Programming", 2023, 4.5)
@@ -37,11 +32,7 @@ def test():
     with open('users.json', 'r') as f: # Read JSON file
         user_set = json.load(f)
 
-    session = get_session()
-    for i in user_set:
-        session.add(User(**i))
-    session.commit()
-    close_session(session=session)
+    library.bulk_add_users(user_set)
 
     user = library.add_user("Alice")
     print(f"Added user: {user['name']}")
@@ -0,0 +1,80 @@
+"""
+In-memory trigram index for Smart Library System.
+Answers arbitrary substring queries over title, author and genre.
+"""
+
+from normalization import normalize
+
+FIELDS = ('title', 'author', 'genre')
+
+def trigrams(value: str) -> set:
+    """All 3-character substrings of `value`."""
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+class TrigramIndex:
+    """
+    Inverted index from trigram to the ids of books containing it.
+
+    A keyword of length >= 3 can only occur in a book that contains every
+    trigram of the keyword, so the candidates are the intersection of those
+    posting lists. Candidates are then verified with `in`. Fields and keywords
+    are normalized first, which gives exactly the same (case- and
+    accent-insensitive) results as Library.naive_search_books.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.documents = {}
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add(self, book_id: int, title: str, author: str, genre: str):
+        """Index one book (re-adding an id replaces the old entry)."""
+        if book_id in self.documents:
+            self.remove(book_id)
+        fields = (normalize(title), normalize(author), normalize(genre))
+        self.documents[book_id] = fields
+        for gram in set().union(*(trigrams(field) for field in fields)):
+            self.postings.setdefault(gram, set()).add(book_id)
+
+    def remove(self, book_id: int):
+        """Drop a book from the index."""
+        fields = self.documents.pop(book_id, None)
+        if fields is None:
+            return
+        for gram in set().union(*(trigrams(field) for field in fields)):
+            posting = self.postings.get(gram)
+            if posting is not None:
+                posting.discard(book_id)
+                if not posting:
+                    del self.postings[gram]
+
+    def candidates(self, keyword: str):
+        """Ids that may contain `keyword`; all ids for keywords shorter than 3."""
+        grams = trigrams(keyword)
+        if not grams:
+            return self.documents.keys()
+        postings = []
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                break
+        return result
+
+    def search(self, keyword: str, fields=None) -> list[int]:
+        """Sorted ids of books whose title, author or genre contains `keyword`."""
+        positions = [FIELDS.index(field) for field in (fields or FIELDS)]
+        keyword = normalize(keyword)
+        documents = self.documents
+        return sorted(
+            book_id for book_id in self.candidates(keyword)
+            if any(keyword in documents[book_id][i] for i in positions)
+        )
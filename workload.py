@@ -0,0 +1,283 @@
+"""
+Workload generator and replay driver for Smart Library System.
+
+generate writes a JSONL stream (one request per line, like requests.jsonl):
+first 'user' rows creating the readers and 'history' rows that seed the
+borrowings table, then a mix of search, borrow, return, recommend and
+profile operations. Book popularity follows a Zipf law and a few users are
+much more active than the rest.
+
+replay copies a books-only database, adds the workload's users and history
+to the copy, then runs the operations against it, either closed-loop (a
+fixed number of clients, each sending its next request when the previous
+one returns) or open-loop at a target rate, and reports throughput and
+latency percentiles per operation type. The source database is never
+modified, so every replay starts from the same state.
+
+Run from the project root:
+    python workload.py generate --books 100000 --users 10000 --ops 20000 --out workload.jsonl
+    python datagen.py books 100000 --format db --out books.db
+    python workload.py replay workload.jsonl --db books.db --concurrency 8
+    python workload.py replay workload.jsonl --db books.db --rate 200
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+from datagen import LAST_NAMES, TITLE_WORDS, user_columns
+
+# Requests that build the starting state rather than measured operations
+SETUP_OPS = ('user', 'history')
+
+DEFAULT_MIX = {'search': 0.45, 'borrow': 0.15, 'return': 0.10, 'recommend': 0.20, 'profile': 0.10}
+
+class ZipfSampler:
+    """Draws ids 1..n with P(rank k) proportional to 1 / k**s; ranks are shuffled over ids."""
+
+    def __init__(self, n: int, s: float, rng):
+        weights = 1.0 / np.arange(1, n + 1) ** s
+        self.cdf = np.cumsum(weights) / weights.sum()
+        self.ids = rng.permutation(n) + 1
+        self.rng = rng
+
+    def sample(self, size: int) -> np.ndarray:
+        return self.ids[np.searchsorted(self.cdf, self.rng.random(size), side='right')]
+
+def generate_workload(n_books: int, n_users: int, n_ops: int, history: int = None,
+                      mix: dict = None, book_skew: float = 1.1, user_skew: float = 1.0,
+                      return_rate: float = 0.7, seed: int = 0):
+    """
+    Yield the requests of a synthetic workload, as dicts.
+
+    `n_users` users (ids 1..n_users once added to an empty users table) and
+    `history` borrowings (default 5 per user) come first, a `return_rate`
+    share of them already returned; then `n_ops` operations drawn from
+    `mix`. A return always names a loan that is open at that point of the
+    stream (when the user has none it becomes a borrow instead).
+    """
+    for i, name in enumerate(user_columns(0, n_users, [seed, 1])['name']):
+        yield {'request_id': f'user-{i + 1:07d}', 'op': 'user', 'args': {'name': name}}
+
+    rng = np.random.default_rng(seed)
+    mix = mix or DEFAULT_MIX
+    books = ZipfSampler(n_books, book_skew, rng)
+    users = ZipfSampler(n_users, user_skew, rng)
+    keywords = np.array(TITLE_WORDS + LAST_NAMES, dtype=object)
+    words = ZipfSampler(len(keywords), 1.0, rng)
+    open_loans = defaultdict(list)
+
+    history = 5 * n_users if history is None else history
+    returned = rng.random(history) < return_rate
+    for i, (user_id, book_id, done) in enumerate(zip(users.sample(history).tolist(), books.sample(history).tolist(), returned)):
+        if not done:
+            open_loans[user_id].append(book_id)
+        yield {'request_id': f'history-{i + 1:07d}', 'op': 'history',
+               'args': {'user_id': user_id, 'book_id': book_id, 'returned': bool(done)}}
+
+    names = list(mix)
+    kinds = rng.choice(len(names), size=n_ops, p=np.array([mix[name] for name in names]) / sum(mix.values()))
+    user_ids = users.sample(n_ops).tolist()
+    book_ids = books.sample(n_ops).tolist()
+    word_ids = words.sample(n_ops).tolist()
+    picks = rng.random(n_ops)
+    for i in range(n_ops):
+        op, user_id = names[kinds[i]], user_ids[i]
+        if op == 'return' and not open_loans[user_id]:
+            op = 'borrow'
+        if op == 'search':
+            args = {'keyword': keywords[word_ids[i] - 1]}
+        elif op == 'borrow':
+            args = {'user_id': user_id, 'book_id': book_ids[i]}
+            open_loans[user_id].append(book_ids[i])
+        elif op == 'return':
+            loans = open_loans[user_id]
+            book_id = loans.pop(int(picks[i] * len(loans)))
+            args = {'user_id': user_id, 'book_id': book_id}
+        else:
+            args = {'user_id': user_id}
+        yield {'request_id': f'op-{i + 1:07d}', 'op': op, 'args': args}
+
+def write_workload(path: str, requests) -> int:
+    """Write requests as JSON lines; return how many."""
+    count = 0
+    with open(path, 'w') as f:
+        for request in requests:
+            f.write(json.dumps(request) + '\n')
+            count += 1
+    return count
+
+def read_workload(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def apply_setup(library, requests, batch_size: int = 10000) -> dict:
+    """
+    Insert the 'user' requests as users and the 'history' requests as
+    borrowings, in bulk; return how many of each. The users table must be
+    empty, so that the users get the ids the workload refers to.
+    """
+    if library.get_statistics()['total_users']:
+        raise ValueError("The database already has users; replay needs one with books only")
+    users = library.bulk_add_users(
+        (request['args'] for request in requests if request['op'] == 'user'), batch_size=batch_size
+    )['rows']
+    now = datetime.utcnow()
+    rows = [
+        {'user_id': request['args']['user_id'], 'book_id': request['args']['book_id'],
+         'returned_at': now if request['args']['returned'] else None}
+        for request in requests if request['op'] == 'history'
+    ]
+    library.bulk_add_borrowings(rows, batch_size=batch_size)
+    return {'users': users, 'borrowings': len(rows)}
+
+def handlers(search_mode: str = 'like', search_limit: int = 20, recommend_mode: str = 'sql') -> dict:
+    """op -> function(library, args) running it."""
+    return {
+        'search': lambda library, args: library.search_books(args['keyword'], mode=search_mode, limit=search_limit),
+        'borrow': lambda library, args: library.borrow_book(args['user_id'], args['book_id']),
+        'return': lambda library, args: library.return_book(args['user_id'], args['book_id']),
+        'recommend': lambda library, args: library.recommend_books(args['user_id'], mode=recommend_mode),
+        'profile': lambda library, args: library.get_user_reading_profile(args['user_id']),
+    }
+
+def replay(library, requests, concurrency: int = 1, rate: float = None, **handler_options) -> dict:
+    """
+    Run every operation (not the setup requests) against `library` and
+    return a report. An operation fails when it raises or, for borrow and
+    return, returns False.
+
+    Without `rate`, `concurrency` clients run closed-loop. With `rate`
+    (requests/sec), request i is due at start + i / rate and is handed to
+    a pool of `concurrency` threads. Its latency is measured from that due
+    time, so queueing behind a saturated pool counts too.
+    """
+    run = handlers(**handler_options)
+    requests = [request for request in requests if request['op'] not in SETUP_OPS]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def execute(request, due=None):
+        start = time.perf_counter()
+        try:
+            failed = run[request['op']](library, request['args']) is False
+        except Exception:
+            failed = True
+        elapsed = time.perf_counter() - (due if due is not None else start)
+        with lock:
+            latencies[request['op']].append(elapsed)
+            errors[request['op']] += failed
+
+    start = time.perf_counter()
+    if rate is None:
+        pending = iter(requests)
+
+        def client():
+            while True:
+                with lock:
+                    request = next(pending, None)
+                if request is None:
+                    return
+                execute(request)
+
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for i, request in enumerate(requests):
+                due = start + i / rate
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(execute, request, due)
+    seconds = time.perf_counter() - start
+
+    operations = {}
+    for op, times in sorted(latencies.items()):
+        times = np.array(times) * 1000
+        p50, p95, p99 = np.percentile(times, [50, 95, 99])
+        operations[op] = {
+            'count': len(times), 'errors': errors[op], 'mean_ms': float(times.mean()),
+            'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99), 'max_ms': float(times.max())
+        }
+    return {
+        'requests': len(requests),
+        'seconds': seconds,
+        'throughput': len(requests) / seconds if seconds > 0 else float('inf'),
+        'concurrency': concurrency,
+        'target_rate': rate,
+        'operations': operations
+    }
+
+def print_report(report: dict):
+    mode = f"open loop at {report['target_rate']:g} req/s" if report['target_rate'] else "closed loop"
+    print(f"{report['requests']} requests in {report['seconds']:.2f} s ({mode}, {report['concurrency']} threads): "
+          f"{report['throughput']:.1f} req/s")
+    for op, stats in report['operations'].items():
+        print(f"  {op:<10} n={stats['count']:<7} errors={stats['errors']:<4} mean {stats['mean_ms']:8.2f} ms   "
+              f"p50 {stats['p50_ms']:8.2f} ms   p95 {stats['p95_ms']:8.2f} ms   p99 {stats['p99_ms']:8.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate or replay library workloads.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    generate = commands.add_parser('generate')
+    generate.add_argument('--books', type=int, required=True)
+    generate.add_argument('--users', type=int, required=True)
+    generate.add_argument('--ops', type=int, default=10000)
+    generate.add_argument('--history', type=int, default=None, help='seed borrowings (default 5 per user)')
+    generate.add_argument('--book-skew', type=float, default=1.1, help='Zipf exponent of book popularity')
+    generate.add_argument('--user-skew', type=float, default=1.0, help='Zipf exponent of user activity')
+    generate.add_argument('--seed', type=int, default=0)
+    generate.add_argument('--out', default='workload.jsonl')
+    play = commands.add_parser('replay')
+    play.add_argument('workload')
+    play.add_argument('--db', default='books.db', help='SQLite file holding the books (left unchanged)')
+    play.add_argument('--work-db', help='where to put the copy replayed against (default: a temporary file)')
+    play.add_argument('--concurrency', type=int, default=1)
+    play.add_argument('--rate', type=float, default=None, help='open-loop target rate (requests/sec)')
+    play.add_argument('--search-mode', choices=['like', 'fts', 'trigram'], default='like')
+    play.add_argument('--recommend-mode', choices=['sql', 'index', 'collaborative'], default='sql')
+    play.add_argument('--cache-size', type=int, default=0)
+    play.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        count = write_workload(args.out, generate_workload(
+            args.books, args.users, args.ops, history=args.history,
+            book_skew=args.book_skew, user_skew=args.user_skew, seed=args.seed
+        ))
+        print(f"Wrote {count} requests to {args.out}")
+        return
+
+    from db_init import EngineConfig
+    from fixtures import clone_database
+    from library import Library
+    requests = read_workload(args.workload)
+    with tempfile.TemporaryDirectory() as directory:
+        work_db = clone_database(args.db, args.work_db or os.path.join(directory, 'replay.db'))
+        library = Library(EngineConfig(url='sqlite:///' + work_db, pool_size=args.concurrency, max_overflow=args.concurrency),
+                          cache_size=args.cache_size)
+        try:
+            seeded = apply_setup(library, requests)
+            print(f"Seeded {seeded['users']} users and {seeded['borrowings']} borrowings into {work_db}")
+            report = replay(library, requests, concurrency=args.concurrency, rate=args.rate,
+                            search_mode=args.search_mode, recommend_mode=args.recommend_mode)
+        finally:
+            library.engine.dispose()
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()